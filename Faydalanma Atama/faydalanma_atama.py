@@ -1,10 +1,15 @@
 import os
+import sys
 import glob
 import pandas as pd
 from datetime import datetime
 
 BASE_DIR = os.path.dirname(__file__)
 
+# Ortak sayı dönüştürme modülü depo kökünde (Stok Kontrol ile paylaşılır)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sayi_donusturme import to_num, to_num_series
+
 KEYS = {
     'faydalanma': ['faydalanma', 'faydal', 'faydalanma'],
     'kilavuz': ['kılavuz', 'kilavuz', 'kılavuz', 'kılavuz'],
@@ -79,20 +84,6 @@ def find_col(df, candidates):
     return None
 
 
-def to_num(x):
-    try:
-        if pd.isna(x):
-            return 0.0
-        return float(x)
-    except:
-        try:
-            s = str(x).replace(',', '.')
-            filtered = ''.join(ch for ch in s if ch.isdigit() or ch == '.')
-            return float(filtered) if filtered not in ('', '.') else 0.0
-        except:
-            return 0.0
-
-
 def parse_diameter_mm(text):
     """Extract diameter in mm from text like 'HT 1.05MM-CT-KY180' or numeric '0.88'."""
     if text is None:
@@ -178,7 +169,10 @@ def main():
         out_desc_col = find_col(df_tuk, ['ÇIKIŞ ÜRÜN AÇIKLAMA', 'CIKIS URUN ACIKLAMA', 'ÇIKIŞ_ÜRÜN_AÇIKLAMA', 'CIKIS_URUN_ACIKLAMA'])
         teyit_col = find_col(df_tuk, ['TEYİT MİKTARI Kg', 'TEYIT MIKTARI Kg', 'TEYIT_MIKTARI_KG', 'TEYIT_MIKTARI'])
         giris_tuketim_col = find_col(df_tuk, ['GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg', 'GIRIS URUN TUKETIM MIKTARI', 'GIRIS_URUN_TUKETIM_MIKTARI'])
-        for _, r in df_tuk.iterrows():
+        # miktar sütunları satır döngüsünden önce toplu çevrilir
+        teyit_amt = to_num_series(df_tuk[teyit_col]) if teyit_col else None
+        giris_amt = to_num_series(df_tuk[giris_tuketim_col]) if giris_tuketim_col else None
+        for pos, (_, r) in enumerate(df_tuk.iterrows()):
             b = r.get(col_t_barkod)
             i = r.get(col_t_isemri) if col_t_isemri else None
             if b is None:
@@ -192,10 +186,10 @@ def main():
             except Exception:
                 use_teyit = False
             if use_teyit:
-                amt = to_num(r.get(teyit_col)) if teyit_col else 0.0
+                amt = teyit_amt[pos] if teyit_col else 0.0
             else:
                 # otherwise use GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg as metres (may be mislabeled)
-                amt = to_num(r.get(giris_tuketim_col)) if giris_tuketim_col else 0.0
+                amt = giris_amt[pos] if giris_tuketim_col else 0.0
             key = (str(i).strip() if i is not None else '', str(b).strip())
             cons_map[key] = cons_map.get(key, 0.0) + amt
 
@@ -0,0 +1,326 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import stok_kontrol as sk
+from sayi_donusturme import to_num, to_num_series
+
+# to_num'un eski sürümüyle aynı sonucu vermesi gereken hücreler
+PARITY_CORPUS = [None, np.nan, pd.NaT, '', '   ', 0, 12, 12.5, -4, True, '12', ' 12.5 ', '+3', '-3.5', '1e3',
+                 '12,5', '12,5 kg', ' 1500 m', '1.234', 'abc', '.', ',', '7 adet', 'kg 30', '1_000', '1e3 kg']
+
+# Eski sürümün 0 veya işaretsiz döndürdüğü, ayraç kuralının belirlediği hücreler
+POLICY_CORPUS = [('1.234,56', 1234.56), ('1,234.56', 1234.56), ('1.234.567', 1234567.0),
+                 ('1,234,567', 1234567.0), ('-3,5', -3.5), ('-1.234,5 kg', -1234.5), ('nan', 0.0), ('inf', 0.0),
+                 # 3'lü gruplara uymayan tekrarlı ayraçlar (tarih, hatalı giriş) sayı değildir
+                 ('12.5.2024', 0.0), ('1.5.', 0.0), ('1.234.56', 0.0), ('12.5.2024,00', 0.0)]
+
+
+def legacy_to_num(x):
+    """Previous per-cell conversion (duplicated in stok_kontrol.py and faydalanma_atama.py)."""
+    try:
+        if pd.isna(x):
+            return 0.0
+        return float(x)
+    except:
+        try:
+            s = str(x).replace(',', '.')
+            filtered = ''.join(ch for ch in s if ch.isdigit() or ch == '.')
+            return float(filtered) if filtered not in ('', '.') else 0.0
+        except:
+            return 0.0
+
+
+def synthetic_exports(n_rows, seed=0):
+    """Üretim / Tüketim / Stok / Sayım-like frames sharing one barcode space."""
+    rng = np.random.default_rng(seed)
+    n_codes = max(n_rows // 4, 1)
+    codes = np.char.add(np.char.add(rng.integers(10_000_000, 99_999_999, n_codes).astype(str), '-'),
+                        rng.integers(1, 60, n_codes).astype(str)).astype(object)
+
+    def barcodes(n):
+        values = codes[rng.integers(0, n_codes, n)].copy()
+        # Elle girilmiş dökümlerdeki gibi boşluklu ve boş barkodlar
+        padded = rng.random(n) < 0.05
+        values[padded] = np.char.add(values[padded].astype(str), ' ')
+        values[rng.random(n) < 0.02] = np.nan
+        return values
+
+    def amounts(n, scale):
+        values = (rng.random(n) * scale).round(2).astype(object)
+        # Metin olarak gelen miktarlar: Türkçe ondalık virgül ve birim eki
+        text = rng.random(n) < 0.05
+        values[text] = np.char.add(np.char.replace(values[text].astype(str), '.', ','), ' kg')
+        values[rng.random(n) < 0.01] = np.nan
+        return values
+
+    descriptions = np.array(['HT 0.66MM-CT-KY140', 'DMT 1.70MM', 'TV 1.70MM-83HC', 'PRV 1.70MM-83HC', ''],
+                            dtype=object)
+    uretim = pd.DataFrame({'ÜRETİLEN BARKOD': barcodes(n_rows), 'METRE_02': amounts(n_rows, 30000),
+                           'MALZEME NO': '7000123', 'MALZEME ADI': 'TV 1.70MM-83HC'})
+    tuketim = pd.DataFrame({
+        'GİRİŞ ÜRÜN SAP BARKODU': barcodes(n_rows),
+        'ÇIKIŞ ÜRÜN ACIKLAMA': descriptions[rng.integers(0, len(descriptions), n_rows)],
+        'TEYİT MİKTARI Kg': amounts(n_rows, 3000),
+        'GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg': amounts(n_rows, 3000),
+        'GİRİŞ ÜRÜN KODU': '7000456',
+        'GİRİŞ ÜRÜN ACIKLAMA': 'TF 5.50MM-1008',
+    })
+    n_small = max(n_rows // 10, 1)
+    stok = pd.DataFrame({'BARKOD KODU': barcodes(n_small), 'MİKTAR': (rng.random(n_small) * 3000).round(2),
+                         'ÜRÜN KODU': '7000789', 'ÜRÜN': 'HT 0.66MM'})
+    sayim = pd.DataFrame({'BOBİN': barcodes(n_small), 'METRE': amounts(n_small, 30000),
+                          'ÜRÜN KODU': '7000123', 'ÜRÜN AÇIKLAMA': 'TV 1.70MM-83HC'})
+    return uretim, tuketim, stok, sayim
+
+
+def legacy_aggregate_add(d, key, amt):
+    if key is None:
+        return
+    k = str(key).strip()
+    if k == '':
+        return
+    d[k] = d.get(k, 0.0) + legacy_to_num(amt)
+
+
+def legacy_sum(df, col_bar, col_amt):
+    """Previous builders: df.iterrows() with aggregate_add per row."""
+    totals = {}
+    for _, r in df.iterrows():
+        legacy_aggregate_add(totals, r.get(col_bar), r.get(col_amt))
+    return totals
+
+
+def legacy_cons(df):
+    cons = {}
+    for _, r in df.iterrows():
+        desc_u = str(r.get('ÇIKIŞ ÜRÜN ACIKLAMA') or '').strip().upper()
+        if desc_u.startswith('H') or desc_u.startswith('DMT'):
+            amt = r.get('TEYİT MİKTARI Kg')
+        else:
+            amt = r.get('GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg')
+        legacy_aggregate_add(cons, r.get('GİRİŞ ÜRÜN SAP BARKODU'), amt)
+    return cons
+
+
+def legacy_single_table(prod, sayim, cons, stok, *metas):
+    """Previous build_single_table core: one dict row per sorted barcode."""
+    rows = []
+    for code in sorted(set().union(prod, sayim, cons, stok)):
+        if '-' not in str(code) or str(code).startswith('M'):
+            continue
+        s_amt, p_amt, c_amt = sayim.get(code, 0.0), prod.get(code, 0.0), cons.get(code, 0.0)
+        stok_amt = stok.get(code)
+        expected = s_amt + p_amt - c_amt
+        malzeme_kodu = malzeme_aciklama = None
+        for meta in metas:
+            malzeme_kodu = malzeme_kodu or meta[0].get(code)
+            malzeme_aciklama = malzeme_aciklama or meta[1].get(code)
+        rows.append({
+            'Malzeme Kodu': malzeme_kodu,
+            'Malzeme Açıklama': malzeme_aciklama,
+            'Barkod': code,
+            'Sayım': s_amt,
+            'Üretim': p_amt,
+            'Tüketim': c_amt,
+            'Stok': 0.0 if stok_amt is None else stok_amt,
+            'Beklenen Stok': expected,
+            'Stok Farkı': (stok_amt if stok_amt is not None else 0) - expected,
+            'Üretilmeden Tüketilen': c_amt if abs(s_amt) < 1e-9 and abs(p_amt) < 1e-9 and c_amt > 0 else 0.0,
+            'Üretimden Fazla Tüketilen': max(0.0, c_amt - p_amt) if c_amt > 0 else 0.0,
+            'Üretilip Kullanılmayan': max(0.0, p_amt - c_amt),
+            'Stokta Üretilmemiş Olan': stok_amt if stok_amt is not None and p_amt <= 0 and stok_amt > 0 else 0.0,
+            'Stokta Yok Ama Tüketilmiş': max(0, c_amt - (s_amt + p_amt)),
+        })
+    return pd.DataFrame(rows)
+
+
+def same_table(legacy, new):
+    if list(legacy.columns) != list(new.columns) or len(legacy) != len(new):
+        return False
+    text = ['Malzeme Kodu', 'Malzeme Açıklama', 'Barkod']
+    numbers = [c for c in legacy.columns if c not in text]
+    return (legacy[text].fillna('').astype(str).equals(new[text].fillna('').astype(str))
+            and np.allclose(legacy[numbers].to_numpy(dtype=float), new[numbers].to_numpy(dtype=float)))
+
+
+def legacy_extract_meta(df, col_bar, col_code, col_desc):
+    """Previous extract_meta: a second iterrows pass per source."""
+    code_map, desc_map = {}, {}
+    for _, r in df.iterrows():
+        bar = r.get(col_bar)
+        if bar is None:
+            continue
+        b = str(bar).strip()
+        if b == '':
+            continue
+        c = r.get(col_code)
+        if c is not None and str(c).strip() != '':
+            code_map[b] = str(c).strip()
+        d = r.get(col_desc)
+        if d is not None and str(d).strip() != '':
+            desc_map[b] = str(d).strip()
+    return code_map, desc_map
+
+
+def same_meta(legacy, new):
+    return {k: v for k, v in legacy.items() if k != 'nan'} == new
+
+
+def same_totals(legacy, new):
+    # Eski döngü boş barkodları 'nan' anahtarında toplar; rapor bunu zaten atar
+    legacy = {k: v for k, v in legacy.items() if k != 'nan'}
+    return legacy.keys() == new.keys() and all(np.isclose(legacy[k], new[k]) for k in legacy)
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<45} {elapsed:8.2f} sn")
+    return result, elapsed
+
+
+def bench_aggregation(n_rows, iterrows_limit):
+    print(f"\n=== Kaynak okuma: toplamlar + malzeme eşlemeleri ({n_rows:,} satır sentetik veri) ===")
+    uretim, tuketim, _, _ = synthetic_exports(n_rows)
+
+    def legacy_uretim(df):
+        return (legacy_sum(df, 'ÜRETİLEN BARKOD', 'METRE_02'),
+                legacy_extract_meta(df, 'ÜRETİLEN BARKOD', 'MALZEME NO', 'MALZEME ADI'))
+
+    def legacy_tuketim(df):
+        return (legacy_cons(df),
+                legacy_extract_meta(df, 'GİRİŞ ÜRÜN SAP BARKODU', 'GİRİŞ ÜRÜN KODU', 'GİRİŞ ÜRÜN ACIKLAMA'))
+
+    cases = [
+        ("Üretim", uretim, legacy_uretim, sk.build_prod_from_uretim),
+        ("Tüketim", tuketim, legacy_tuketim, sk.build_cons_from_tuketim),
+    ]
+    for name, df, legacy, new in cases:
+        sample = df.iloc[:min(iterrows_limit, n_rows)]
+        old, t_old = timed(f"{name} eski (2 x iterrows, {len(sample):,} satır)", legacy, sample)
+        t_old_full = t_old * n_rows / len(sample)
+        if len(sample) < n_rows:
+            print(f"  {f'{name} eski, tüm veri için tahmini':<45} {t_old_full:8.2f} sn")
+        _, t_new = timed(f"{name} yeni (tek geçiş, groupby)", new, df)
+        totals, meta = new(sample)
+        same = same_totals(old[0], totals) and all(same_meta(o, m) for o, m in zip(old[1], meta))
+        print(f"  -> hızlanma: {t_old_full / t_new:.1f}x, aynı sonuç: {'evet' if same else 'HAYIR'}")
+
+
+def check_coercion():
+    print("\n=== Sayı dönüştürme derlemi ===")
+    cells = PARITY_CORPUS + [value for value, _ in POLICY_CORPUS]
+    expected = [legacy_to_num(v) for v in PARITY_CORPUS] + [value for _, value in POLICY_CORPUS]
+    scalar = [to_num(v) for v in cells]
+    column = to_num_series(pd.Series(cells, dtype=object)).tolist()
+    failures = [(c, e, a, b) for c, e, a, b in zip(cells, expected, scalar, column) if not (e == a == b)]
+    for cell, want, got_scalar, got_column in failures:
+        print(f"  HATA {cell!r}: beklenen {want}, to_num {got_scalar}, to_num_series {got_column}")
+    print(f"  {len(cells) - len(failures)}/{len(cells)} hücre doğru "
+          f"({len(PARITY_CORPUS)} eski sürümle aynı, {len(POLICY_CORPUS)} ayraç kuralı)")
+    return not failures
+
+
+def text_amounts(n_rows, seed=0):
+    """Quantity column exported as text: decimal comma, some with a unit, few distinct values."""
+    rng = np.random.default_rng(seed)
+    values = np.char.replace((rng.integers(0, 50_000, n_rows) / 10).astype(str), '.', ',').astype(object)
+    unit = rng.random(n_rows) < 0.3
+    values[unit] = np.char.add(values[unit].astype(str), ' kg')
+    values[rng.random(n_rows) < 0.01] = np.nan
+    return pd.Series(values, dtype=object)
+
+
+def bench_coercion(n_rows, loop_limit):
+    """Time the column conversion against per-cell ``to_num``; False when it is not faster."""
+    faster = True
+    columns = [("%5 metin", synthetic_exports(n_rows)[0]['METRE_02']), ("tamamı metin", text_amounts(n_rows))]
+    for name, values in columns:
+        print(f"\n=== Sayı dönüştürme ({n_rows:,} hücre, {name}) ===")
+        sample = values.iloc[:min(loop_limit, n_rows)]
+        _, t_legacy = timed(f"Eski to_num ({len(sample):,} hücre)", lambda v: [legacy_to_num(x) for x in v], sample)
+        if len(sample) < n_rows:
+            print(f"  {'Eski to_num, tüm veri için tahmini':<45} {t_legacy * n_rows / len(sample):8.2f} sn")
+        _, t_cell = timed(f"to_num hücre hücre ({len(sample):,} hücre)", lambda v: [to_num(x) for x in v], sample)
+        t_cell_full = t_cell * n_rows / len(sample)
+        if len(sample) < n_rows:
+            print(f"  {'to_num hücre hücre, tüm veri için tahmini':<45} {t_cell_full:8.2f} sn")
+        _, t_new = timed("to_num_series (to_numeric + benzersiz metinler)", to_num_series, values)
+        print(f"  -> to_num'a göre hızlanma: {t_cell_full / t_new:.1f}x")
+        faster &= t_new < t_cell_full
+    return faster
+
+
+def bench_reconciliation(n_rows):
+    print(f"\n=== Tek tablo mutabakatı ({n_rows:,} satırlık kaynaklardan) ===")
+    uretim, tuketim, stok, sayim = synthetic_exports(n_rows)
+    ingested = (sk.build_prod_from_uretim(uretim), sk.build_prod_from_sayim(sayim),
+                sk.build_cons_from_tuketim(tuketim), sk.build_stock(stok))
+    sources = tuple(totals for totals, _ in ingested)
+    # Öncelik sırası: sayım -> üretim -> stok -> tüketim
+    metas = tuple(ingested[i][1] for i in (1, 0, 3, 2))
+    print(f"  ({len(set().union(*sources)):,} barkod)")
+    old, t_old = timed("Eski (barkod başına döngü)", legacy_single_table, *sources, *metas)
+    (new, _), t_new = timed("Yeni (dış birleşim + NumPy)", sk.build_single_table, *sources, *metas)
+    print(f"  -> hızlanma: {t_old / t_new:.1f}x, aynı tablo: {'evet' if same_table(old, new) else 'HAYIR'}")
+
+
+def legacy_write_report(df, out_file):
+    """Previous writer: to_excel, then '#,##0' set on every numeric cell by address."""
+    from openpyxl.utils import get_column_letter
+    with pd.ExcelWriter(out_file, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Rapor', index=False)
+        worksheet = writer.sheets['Rapor']
+        for idx, col in enumerate(df.columns, 1):
+            if any(col.startswith(nk) for nk in sk.NUMERIC_COLUMNS):
+                col_letter = get_column_letter(idx)
+                for row in range(2, 2 + len(df)):
+                    worksheet[f"{col_letter}{row}"].number_format = '#,##0'
+
+
+def bench_report_writer(n_rows):
+    import tempfile
+    print(f"\n=== Rapor yazımı ({n_rows:,} satırlık tablo) ===")
+    uretim, tuketim, stok, sayim = synthetic_exports(n_rows * 4)
+    sources = [sk.build_prod_from_uretim(uretim)[0], sk.build_prod_from_sayim(sayim)[0],
+               sk.build_cons_from_tuketim(tuketim)[0], sk.build_stock(stok)[0]]
+    (table, _), _ = timed("Tablonun hesaplanması", sk.build_single_table, *sources)
+    table = table.iloc[:n_rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        _, t_old = timed("Eski (hücre hücre number_format)", legacy_write_report, table,
+                         os.path.join(tmp, 'eski.xlsx'))
+        _, t_new = timed("Yeni (write_report)", sk.write_report, table, os.path.join(tmp, 'yeni.xlsx'))
+    print(f"  -> hızlanma: {t_old / t_new:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stok kontrol performans ölçümleri")
+    parser.add_argument('--satir', type=int, default=500_000, help="Sentetik veri satır sayısı")
+    parser.add_argument('--rapor-satir', type=int, default=200_000,
+                        help="Rapor yazım ölçümündeki satır sayısı (0: atla)")
+    parser.add_argument('--iterrows-limit', type=int, default=50_000,
+                        help="iterrows ölçümü bu kadar satırla yapılıp tüm veriye ölçeklenir")
+    args = parser.parse_args()
+    # Derlem hatası ölçümü durdurur: ayraç kuralı bozulmuşsa hızlanma anlamsız
+    if not check_coercion():
+        sys.exit(1)
+    # Sütun dönüştürme hücre hücre to_num'dan yavaşsa ölçüm başarısız sayılır
+    if not bench_coercion(args.satir, args.iterrows_limit):
+        print("HATA: to_num_series hücre hücre to_num'dan yavaş.")
+        sys.exit(1)
+    bench_aggregation(args.satir, args.iterrows_limit)
+    bench_reconciliation(args.satir)
+    if args.rapor_satir:
+        bench_report_writer(args.rapor_satir)
+
+
+if __name__ == '__main__':
+    main()
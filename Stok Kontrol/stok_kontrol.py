@@ -1,13 +1,25 @@
 import os
+import sys
 import glob
 import re
+import numpy as np
 import pandas as pd
 
 BASE_DIR = os.path.dirname(__file__)
 
+# Ortak sayı dönüştürme modülü depo kökünde (Faydalanma Atama ile paylaşılır)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sayi_donusturme import to_num_series
+
 # Eğer True ise stok değeri eksikse 0 ile doldurulur; False ise boş bırakılır
 FILL_EMPTY_STOCK = True
 
+# Raporda binlik ayraçlı tam sayı olarak biçimlenen sütunlar
+NUMERIC_COLUMNS = ['Sayım', 'Üretim', 'Tüketim', 'Beklenen Stok', 'Stok', 'Stok Farkı', 'Üretilmeden Tüketilen',
+                   'Üretimden Fazla Tüketilen', 'Üretilip Kullanılmayan', 'Stokta Üretilmemiş Olan',
+                   'Stokta Yok Ama Tüketilmiş']
+NUMBER_FORMAT = '#,##0'
+
 KEYS = {
     'sayim': ['sayim', 'sayım', 'count'],
     'uretim': ['uretim', 'üretim', 'production'],
@@ -73,19 +85,6 @@ def find_col(df, names):
                 return orig
     return None
 
-def to_num(x):
-    try:
-        if pd.isna(x):
-            return 0.0
-        return float(x)
-    except:
-        try:
-            s = str(x).replace(',', '.')
-            filtered = ''.join(ch for ch in s if ch.isdigit() or ch == '.')
-            return float(filtered) if filtered not in ('', '.') else 0.0
-        except:
-            return 0.0
-
 def fmt_num_for_excel(x):
     # round to integer, use dot as thousands separator (Türkçe binlik ayraç isteğine göre)
     if x is None:
@@ -103,185 +102,193 @@ def fmt_num_for_excel(x):
     # convert comma grouping to dot (1,234 -> 1.234) for Turkish-style thousands separator
     return s.replace(',', '.')
 
-def aggregate_add(d, key, amt):
-    if key is None:
-        return
-    k = str(key).strip()
-    if k == '':
-        return
-    d[k] = d.get(k, 0.0) + to_num(amt)
+def barcode_keys(values):
+    """Column form of the key handling in the old per-row loop: stripped text, NaN for skipped rows."""
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    keys = values.astype(str).str.strip()
+    return keys.where(values.notna() & (keys != ''))
+
+def sum_by_barcode(keys, amounts):
+    """Sum ``to_num`` amounts per barcode key with one groupby (first-seen key order)."""
+    amt = to_num_series(amounts) if amounts is not None else np.zeros(len(keys))
+    valid = keys.notna().to_numpy()
+    return pd.Series(amt[valid]).groupby(keys[valid].to_numpy(), sort=False).sum().to_dict()
+
+def meta_map(keys, values):
+    """barcode -> last non-empty stripped value (dropna, strip, drop_duplicates keep='last')."""
+    if values is None:
+        return {}
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    text = values[values.notna()].astype(str).str.strip()
+    pairs = pd.DataFrame({'barkod': keys[text.index], 'deger': text})
+    pairs = pairs[pairs['deger'] != ''].dropna().drop_duplicates('barkod', keep='last')
+    return dict(zip(pairs['barkod'], pairs['deger']))
+
+def ingest(df, col_bar, amounts, col_code=None, col_desc=None):
+    """
+    One scan of a source frame: barcodes are normalized once and shared by the
+    per-barcode totals and the (barcode -> code, barcode -> description) maps.
+    """
+    keys = barcode_keys(df[col_bar])
+    meta = (meta_map(keys, df[col_code] if col_code is not None else None),
+            meta_map(keys, df[col_desc] if col_desc is not None else None))
+    return sum_by_barcode(keys, amounts), meta
 
 def build_prod_from_sayim(df):
-    prod = {}
     if df is None:
-        return prod
+        return {}, ({}, {})
     col_bar = find_col(df, ['BOBİN', 'BOBIN', 'BOBIN ', 'Bobin', 'Barkod'])
     col_m = find_col(df, ['METRE', 'Metre', 'METRE '])
+    col_code = find_col(df, ['ÜRÜN KODU', 'URUN KODU', 'ÜRÜN KOD', 'URUN_KODU', 'Ürün Kodu'])
+    col_desc = find_col(df, ['ÜRÜN AÇIKLAMA', 'URUN ACIKLAMA'])
     if col_bar is None:
         col_bar = df.columns[0] if len(df.columns)>0 else None
-    for _, r in df.iterrows():
-        aggregate_add(prod, r.get(col_bar), r.get(col_m))
-    return prod
+    if col_bar is None:
+        return {}, ({}, {})
+    return ingest(df, col_bar, df[col_m] if col_m is not None else None, col_code, col_desc)
 
 def build_prod_from_uretim(df):
-    prod = {}
     if df is None:
-        return prod
+        return {}, ({}, {})
     col_bar = find_col(df, ['ÜRETİLEN BARKOD', 'URETILEN BARKOD', 'BARKOD', 'Barkod'])
     col_m = find_col(df, ['METRE_02', 'METRE 02', 'METRE02', 'METRE'])
-    for _, r in df.iterrows():
-        aggregate_add(prod, r.get(col_bar), r.get(col_m))
-    return prod
+    col_code = find_col(df, ['MALZEME NO', 'MALZEME_NO', 'MALZEME'])
+    col_desc = find_col(df, ['MALZEME ADI', 'MALZEME_ADI'])
+    if col_bar is None:
+        return {}, ({}, {})
+    return ingest(df, col_bar, df[col_m] if col_m is not None else None, col_code, col_desc)
 
 def build_cons_from_tuketim(df):
-    cons = {}
     if df is None:
-        return cons
+        return {}, ({}, {})
     col_bar = find_col(df, ['GİRİŞ ÜRÜN SAP BARKODU', 'GIRIS URUN SAP BARKODU', 'Barkod', 'BARKOD'])
     col_desc = find_col(df, ['ÇIKIŞ ÜRÜN ACIKLAMA', 'CIKIS URUN ACIKLAMA', 'AÇIKLAMA', 'Aciklama'])
     col_teyit = find_col(df, ['TEYİT MİKTARI Kg', 'TEYIT MIKTARI Kg', 'TEYIT MIKTARI', 'TEYİT MİKTARI'])
     col_giris = find_col(df, ['GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg', 'GIRIS URUN TUKETIM MIKTARI', 'GİRİŞ ÜRÜN TÜKETİM MİKTARI', 'GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg'])
-    for _, r in df.iterrows():
-        code = r.get(col_bar)
-        desc = '' if col_desc is None else str(r.get(col_desc) or '')
-        desc_u = desc.strip().upper()
-        if desc_u.startswith('H') or desc_u.startswith('H ') or desc_u.startswith('DMT'):
-            amt = r.get(col_teyit) if col_teyit is not None else r.get(col_giris)
-        else:
-            amt = r.get(col_giris) if col_giris is not None else r.get(col_teyit)
-        aggregate_add(cons, code, amt)
-    return cons
+    col_in_code = find_col(df, ['GİRİŞ ÜRÜN KODU', 'GIRIS URUN KODU', 'GIRIS_URUN_KODU'])
+    col_in_desc = find_col(df, ['GİRİŞ ÜRÜN ACIKLAMA', 'GIRIS URUN ACIKLAMA', 'AÇIKLAMA', 'Aciklama'])
+    if col_bar is None:
+        return {}, ({}, {})
+    # H... / DMT... çıkışlarında teyit miktarı, diğerlerinde giriş tüketim miktarı kullanılır
+    if col_desc is None:
+        is_h = np.zeros(len(df), dtype=bool)
+    else:
+        desc = df[col_desc].astype(object)
+        desc_u = desc.where(desc.astype(bool), '').astype(str).str.strip().str.upper()
+        is_h = desc_u.str.match(r'H|DMT').to_numpy(dtype=bool)
+    teyit = to_num_series(df[col_teyit]) if col_teyit is not None else None
+    giris = to_num_series(df[col_giris]) if col_giris is not None else None
+    zeros = np.zeros(len(df))
+    h_amt = teyit if teyit is not None else giris if giris is not None else zeros
+    other_amt = giris if giris is not None else teyit if teyit is not None else zeros
+    return ingest(df, col_bar, np.where(is_h, h_amt, other_amt), col_in_code, col_in_desc)
 
 def build_stock(df):
-    stok = {}
     if df is None:
-        return stok
+        return {}, ({}, {})
     col_bar = find_col(df, ['BARKOD KODU', 'Barkod Kodu', 'BARKOD', 'Barkod'])
     col_amt = find_col(df, ['MİKTAR', 'MIKTAR', 'Miktar', 'MİKTAR '])
-    for _, r in df.iterrows():
-        aggregate_add(stok, r.get(col_bar), r.get(col_amt))
-    return stok
-
+    col_code = find_col(df, ['ÜRÜN KODU', 'URUN KODU', 'Ürün Kodu'])
+    col_desc = find_col(df, ['ÜRÜN', 'Ürün', 'ÜRÜN AÇIKLAMA'])
+    if col_bar is None:
+        return {}, ({}, {})
+    return ingest(df, col_bar, df[col_amt] if col_amt is not None else None, col_code, col_desc)
 
-def extract_meta(df, barcode_candidates, code_candidates, desc_candidates):
-    """Return two dicts mapping barcode -> code and barcode -> description."""
-    code_map = {}
-    desc_map = {}
-    if df is None:
-        return code_map, desc_map
-    col_bar = find_col(df, barcode_candidates)
-    col_code = find_col(df, code_candidates)
-    col_desc = find_col(df, desc_candidates)
-    for _, r in df.iterrows():
-        bar = r.get(col_bar)
-        if bar is None:
-            continue
-        b = str(bar).strip()
-        if b == '':
-            continue
-        if col_code is not None:
-            c = r.get(col_code)
-            if c is not None and str(c).strip() != '':
-                code_map[b] = str(c).strip()
-        if col_desc is not None:
-            d = r.get(col_desc)
-            if d is not None and str(d).strip() != '':
-                desc_map[b] = str(d).strip()
-    return code_map, desc_map
+def meta_column(index, metas, which):
+    """First non-empty value per barcode in ``metas`` priority order (combine_first chain)."""
+    column = pd.Series(np.nan, index=index, dtype=object)
+    for meta in metas:
+        if meta is not None:
+            column = column.combine_first(pd.Series(meta[which], dtype=object).reindex(index))
+    return column
 
 def build_single_table(prod, sayim, cons, stok, sayim_meta=None, uretim_meta=None, stok_meta=None, cons_meta=None):
-    all_codes = set().union(prod.keys(), sayim.keys(), cons.keys(), stok.keys())
-    rows = []
-    for code in sorted(all_codes):
-        # Barkod kontrolü: "-" tire işareti yoksa veya "M" ile başlıyorsa atla
-        if '-' not in str(code) or str(code).startswith('M'):
-            continue
-        s_amt = to_num(sayim.get(code, 0.0))
-        p_amt = to_num(prod.get(code, 0.0))
-        c_amt = to_num(cons.get(code, 0.0))
-        stok_amt = stok.get(code)
-        stok_amt_n = None if stok_amt is None else to_num(stok_amt)
-
-        expected = s_amt + p_amt - c_amt
-
-        
+    # Dört kaynağın barkod bazında dış birleşimi (sıralı barkodlar)
+    amounts = pd.DataFrame({
+        'Sayım': pd.Series(sayim, dtype=float),
+        'Üretim': pd.Series(prod, dtype=float),
+        'Tüketim': pd.Series(cons, dtype=float),
+        'Stok': pd.Series(stok, dtype=float),
+    }).sort_index()
+    # Barkod kontrolü: "-" tire işareti yoksa veya "M" ile başlıyorsa atla
+    codes = amounts.index.to_series().astype(str)
+    amounts = amounts[(codes.str.contains('-', regex=False) & ~codes.str.startswith('M')).to_numpy()]
+
+    s_amt = amounts['Sayım'].fillna(0.0).to_numpy()
+    p_amt = amounts['Üretim'].fillna(0.0).to_numpy()
+    c_amt = amounts['Tüketim'].fillna(0.0).to_numpy()
+    stok_amt = amounts['Stok'].to_numpy()
+    expected = s_amt + p_amt - c_amt
+
+    # Malzeme kodu ve açıklama: öncelik sayım -> üretim -> stok -> tüketim
+    metas = (sayim_meta, uretim_meta, stok_meta, cons_meta)
+    df = pd.DataFrame({
+        'Malzeme Kodu': meta_column(amounts.index, metas, 0).to_numpy(),
+        'Malzeme Açıklama': meta_column(amounts.index, metas, 1).to_numpy(),
+        'Barkod': amounts.index.to_numpy(),
+        'Sayım': s_amt,
+        'Üretim': p_amt,
+        'Tüketim': c_amt,
+        'Stok': stok_amt,
+        'Beklenen Stok': expected,
+        'Stok Farkı': np.nan_to_num(stok_amt, nan=0.0) - expected,
         # Eğer sayım ve üretim değeri yoksa (her ikisi de 0) ve tüketim varsa,
         # "üretilmeden tüketilen" sütununda doğrudan tüketim gösterilsin.
-        if (abs(s_amt) < 1e-9) and (abs(p_amt) < 1e-9) and (c_amt > 0):
-            uretilmeden_tuketilen = c_amt
-        else:
-            uretilmeden_tuketilen = 0.0
-        uretimden_fazla_tuketim = max(0.0, c_amt - p_amt) if c_amt > 0 else 0.0
-        uretilip_kullanilmayan = max(0.0, p_amt - c_amt)
-        stokta_uretilmemis_olan = stok_amt_n if (stok_amt_n is not None and p_amt <= 0 and stok_amt_n > 0) else 0.0
-        # Eğer sayım ve üretim değeri yok (0) ve stokta kayıt yok veya 0 ise
-        # ve tüketim varsa, "Stokta Yok Ama Tüketilmiş" sütununa tüketim yazılsın.
-        stokta_yok_ama_tuketim = max(0, c_amt - (s_amt + p_amt))
-        stok_uyusmazligi = (stok_amt_n if stok_amt_n is not None else 0) - expected
-        
-        
-        # Malzeme kodu ve açıklama: öncelik sayım -> üretim -> stok -> tüketim
-        malzeme_kodu = None
-        malzeme_aciklama = None
-        if sayim_meta is not None:
-            malzeme_kodu = sayim_meta[0].get(code) or malzeme_kodu
-            malzeme_aciklama = sayim_meta[1].get(code) or malzeme_aciklama
-        if uretim_meta is not None:
-            malzeme_kodu = malzeme_kodu or uretim_meta[0].get(code)
-            malzeme_aciklama = malzeme_aciklama or uretim_meta[1].get(code)
-        if stok_meta is not None:
-            malzeme_kodu = malzeme_kodu or stok_meta[0].get(code)
-            malzeme_aciklama = malzeme_aciklama or stok_meta[1].get(code)
-        if cons_meta is not None:
-            malzeme_kodu = malzeme_kodu or cons_meta[0].get(code)
-            malzeme_aciklama = malzeme_aciklama or cons_meta[1].get(code)
-
-        rows.append({
-            'Barkod': code,
-            'Sayım': s_amt,
-            'Üretim': p_amt,
-            'Tüketim': c_amt,
-            'Stok': stok_amt_n,
-            'Malzeme Kodu': malzeme_kodu,
-            'Malzeme Açıklama': malzeme_aciklama,
-            'Beklenen Stok': expected,
-            'Stok Farkı': stok_uyusmazligi,
-            'Üretilmeden Tüketilen': uretilmeden_tuketilen,
-            'Üretimden Fazla Tüketilen': uretimden_fazla_tuketim,
-            'Üretilip Kullanılmayan': uretilip_kullanilmayan,
-            'Stokta Üretilmemiş Olan': stokta_uretilmemis_olan,
-            'Stokta Yok Ama Tüketilmiş': stokta_yok_ama_tuketim
-        })
-    df = pd.DataFrame(rows)
-    # Malzeme bilgilerini ilk iki sütun yap: 'Malzeme Kodu', 'Malzeme Açıklama'
-    cols = list(df.columns)
-    new_order = []
-    for c in ['Malzeme Kodu', 'Malzeme Açıklama']:
-        if c in cols:
-            new_order.append(c)
-    for c in cols:
-        if c not in new_order:
-            new_order.append(c)
-    df = df[new_order]
-
-    # Numeric columns: convert to numbers so Excel can compute on them
-    numeric_cols = [
-        'Sayım', 'Üretim', 'Tüketim',
-        'Beklenen Stok', 'Stok', 'Stok Farkı',
-        'Üretilmeden Tüketilen', 'Üretimden Fazla Tüketilen', 'Üretilip Kullanılmayan',
-        'Stokta Üretilmemiş Olan', 'Stokta Yok Ama Tüketilmiş'
-    ]
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        'Üretilmeden Tüketilen': np.where((np.abs(s_amt) < 1e-9) & (np.abs(p_amt) < 1e-9) & (c_amt > 0), c_amt, 0.0),
+        'Üretimden Fazla Tüketilen': np.where(c_amt > 0, np.maximum(0.0, c_amt - p_amt), 0.0),
+        'Üretilip Kullanılmayan': np.maximum(0.0, p_amt - c_amt),
+        'Stokta Üretilmemiş Olan': np.where((p_amt <= 0) & (stok_amt > 0), stok_amt, 0.0),
+        # Sayım ve üretim toplamını aşan tüketim "Stokta Yok Ama Tüketilmiş" sütununa yazılır
+        'Stokta Yok Ama Tüketilmiş': np.maximum(0.0, c_amt - (s_amt + p_amt)),
+    })
 
     # Stok eksikse davranış: doldur veya bırak
-    if 'Stok' in df.columns:
-        if FILL_EMPTY_STOCK:
-            df['Stok'] = df['Stok'].fillna(0.0)
+    if FILL_EMPTY_STOCK:
+        df['Stok'] = df['Stok'].fillna(0.0)
 
     return df, None  # return dataframe (numeric). formatted view not used to avoid strings
 
+def write_report(df, out_file, sheet_name='Rapor'):
+    """
+    Write the report through an openpyxl write-only workbook: pandas' bold, bordered header
+    and '#,##0' on numeric columns, without loading the sheet back to format it cell by cell.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_name)
+    # to_excel başlığıyla aynı görünüm: kalın, ince kenarlıklı, ortalanmış
+    thin = Side(style='thin')
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        header.append(cell)
+    ws.append(header)
+
+    # başlığı sayısal sütun adlarından biriyle başlayan sütunlar biçimlenir; write-only sayfa
+    # hücreyi append anında yazdığı için her sütunun biçimli hücresi satırlar boyunca yeniden kullanılır
+    numeric = {}
+    for idx, col in enumerate(df.columns):
+        if isinstance(col, str) and any(col.startswith(nk) for nk in NUMERIC_COLUMNS):
+            numeric[idx] = WriteOnlyCell(ws)
+            numeric[idx].number_format = NUMBER_FORMAT
+    for values in df.itertuples(index=False, name=None):
+        row = list(values)
+        for idx, value in enumerate(row):
+            # NaN hücreler boş yazılır (to_excel ile aynı)
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                row[idx] = None
+            elif idx in numeric:
+                numeric[idx].value = value
+                row[idx] = numeric[idx]
+        ws.append(row)
+    wb.save(out_file)
+
 def main():
     files = find_files()
     # Sayım dosyasından "YARI MAMUL" sayfasını oku (yoksa ilk sayfa)
@@ -290,43 +297,12 @@ def main():
     df_tuketim = safe_read(files.get('tuketim'))
     df_stok = safe_read(files.get('stok'))
 
-    # üretim
-    prod_from_uretim = build_prod_from_uretim(df_uretim)
-    prod = {k: to_num(v) for k, v in prod_from_uretim.items()}
-
+    # Her kaynak tek geçişte: barkod bazında toplamlar ve malzeme kodu/açıklama eşlemeleri
+    prod, uretim_meta = build_prod_from_uretim(df_uretim)
     # sayım (YARI MAMUL sayfasından alınmış df_sayim)
-    sayim = {}
-    if df_sayim is not None:
-        col_bobin = find_col(df_sayim, ['BOBİN', 'BOBIN', 'Bobin', 'Barkod'])
-        col_metre = find_col(df_sayim, ['METRE', 'Metre'])
-        if col_bobin is None:
-            col_bobin = df_sayim.columns[0] if len(df_sayim.columns)>0 else None
-        for _, r in df_sayim.iterrows():
-            aggregate_add(sayim, r.get(col_bobin), r.get(col_metre))
-
-    cons = build_cons_from_tuketim(df_tuketim)
-    stok = build_stock(df_stok)
-
-    # Meta (malzeme kodu/açıklama) çıkar
-    sayim_meta = extract_meta(df_sayim,
-                              ['BOBİN', 'BOBIN', 'BOBIN ', 'Bobin', 'Barkod'],
-                              ['ÜRÜN KODU', 'URUN KODU', 'ÜRÜN KOD', 'URUN_KODU', 'Ürün Kodu'],
-                              ['ÜRÜN AÇIKLAMA', 'URUN ACIKLAMA', 'ÜRÜN AÇIKLAMA', 'ÜRÜN AÇIKLAMA'])
-
-    uretim_meta = extract_meta(df_uretim,
-                               ['ÜRETİLEN BARKOD', 'URETILEN BARKOD', 'BARKOD', 'Barkod'],
-                               ['MALZEME NO', 'MALZEME_NO', 'MALZEME', 'MALZEME NO'],
-                               ['MALZEME ADI', 'MALZEME_ADI', 'MALZEME ADI'])
-
-    stok_meta = extract_meta(df_stok,
-                             ['BARKOD KODU', 'Barkod Kodu', 'BARKOD', 'Barkod'],
-                             ['ÜRÜN KODU', 'URUN KODU', 'Ürün Kodu'],
-                             ['ÜRÜN', 'Ürün', 'ÜRÜN AÇIKLAMA'])
-
-    cons_meta = extract_meta(df_tuketim,
-                             ['GİRİŞ ÜRÜN SAP BARKODU', 'GIRIS URUN SAP BARKODU', 'Barkod', 'BARKOD'],
-                             ['GİRİŞ ÜRÜN KODU', 'GIRIS URUN KODU', 'GIRIS_URUN_KODU'],
-                             ['GİRİŞ ÜRÜN ACIKLAMA', 'GIRIS URUN ACIKLAMA', 'AÇIKLAMA', 'Aciklama'])
+    sayim, sayim_meta = build_prod_from_sayim(df_sayim)
+    cons, cons_meta = build_cons_from_tuketim(df_tuketim)
+    stok, stok_meta = build_stock(df_stok)
 
     df_raw, _ = build_single_table(prod, sayim, cons, stok, sayim_meta, uretim_meta, stok_meta, cons_meta)
 
@@ -337,23 +313,7 @@ def main():
     df_write = df_raw.copy()
     df_write.columns = [re.sub(r"\s*\(.*?\)", "", c).strip() if isinstance(c, str) else c for c in df_write.columns]
 
-    with pd.ExcelWriter(out_file, engine='openpyxl') as writer:
-        df_write.to_excel(writer, sheet_name='Rapor', index=False)
-        # set Excel number format for numeric columns
-        workbook = writer.book
-        worksheet = writer.sheets['Rapor']
-        # map column names to excel col letters
-        from openpyxl.utils import get_column_letter
-        numeric_names = ['Sayım', 'Üretim', 'Tüketim', 'Beklenen Stok', 'Stok', 'Stok Farkı', 'Üretilmeden Tüketilen', 'Üretimden Fazla Tüketilen', 'Üretilip Kullanılmayan', 'Stokta Üretilmemiş Olan', 'Stokta Yok Ama Tüketilmiş']
-        # normalize numeric name matching by checking start of header
-        for idx, col in enumerate(df_write.columns, 1):
-            for nk in numeric_names:
-                if isinstance(col, str) and col.startswith(nk):
-                    col_letter = get_column_letter(idx)
-                    for row in range(2, 2 + len(df_write)):
-                        cell = worksheet[f"{col_letter}{row}"]
-                        cell.number_format = '#,##0'
-                    break
+    write_report(df_write, out_file)
     print(f"İşlem tamam. Tek tablo raporu: {out_file}")
 
 if __name__ == '__main__':
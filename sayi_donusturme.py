@@ -0,0 +1,87 @@
+"""
+Sayı dönüştürme: Excel dökümlerindeki miktar hücrelerini float'a çevirir.
+
+Stok Kontrol ve Faydalanma Atama araçları bu modülü ortak kullanır. ``to_num`` tek
+hücre, ``to_num_series`` bütün sütun içindir; ikisi aynı kuralları uygular:
+
+- Boş hücre (NaN/None/boş metin) ve sayı içermeyen metin 0.0 olur.
+- Sayılar ve düz sayı metinleri ('12', ' -3.5 ', '1e3') olduğu gibi çevrilir.
+- Diğer metinlerde rakam ve ayraç dışındaki karakterler atılır ('12,5 kg' -> 12.5);
+  baştaki '-' işareti korunur.
+- Ayraçlar: iki farklı ayraç varsa sondaki ondalık, diğeri binliktir
+  ('1.234,56' ve '1,234.56' -> 1234.56). Tek tür ayraç birden fazla geçiyorsa
+  binliktir ('1.234.567' -> 1234567). Binlik kısım 3'lü gruplardan oluşmalıdır;
+  oluşmuyorsa hücre sayı değildir ('12.5.2024', '1.5.' -> 0.0). Tek virgül
+  ondalıktır ('12,5' -> 12.5); tek nokta da ondalıktır ('1.234' -> 1.234), yani
+  binlik olduğu belirsiz tek ayraç her zaman ondalık sayılır.
+- 'nan'/'inf' gibi metinler sayı değil boş kabul edilir (toplamları bozmazlar).
+"""
+import re
+import numpy as np
+import pandas as pd
+
+# float() ile doğrudan okunabilen düz sayılar
+PLAIN_NUMBER = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+NON_NUMERIC = re.compile(r'[^\d.,]')
+SEPARATORS = re.compile(r'[.,]')
+DECIMAL = re.compile(r'\d+\.?\d*|\.\d+')
+# Binlik gruplama: ilk grup 1-3, sonrakiler tam 3 rakam
+GROUPED = re.compile(r'\d{1,3}(?:[.,]\d{3})+')
+
+
+def _normalize_separators(digits):
+    """Digits and separators as float() text; None when the separators cannot belong to a number."""
+    separators = SEPARATORS.findall(digits)
+    if len(separators) <= 1:
+        return digits.replace(',', '.')
+    decimal = separators[-1]
+    if len(set(separators)) == 1:
+        return SEPARATORS.sub('', digits) if GROUPED.fullmatch(digits) else None
+    head, _, tail = digits.rpartition(decimal)
+    if decimal in head or not GROUPED.fullmatch(head):
+        return None
+    return SEPARATORS.sub('', head) + '.' + tail
+
+
+def _parse_text(text):
+    text = text.strip()
+    if PLAIN_NUMBER.fullmatch(text):
+        return float(text)
+    digits = _normalize_separators(NON_NUMERIC.sub('', text))
+    if digits is None or not DECIMAL.fullmatch(digits):
+        return 0.0
+    value = float(digits)
+    return -value if text.startswith('-') else value
+
+
+def to_num(x):
+    """Convert one cell to float (0.0 for empty or non-numeric cells)."""
+    if isinstance(x, str):
+        return _parse_text(x)
+    try:
+        if pd.isna(x):
+            return 0.0
+        return float(x)
+    except (TypeError, ValueError):
+        return _parse_text(str(x))
+
+
+def to_num_series(values):
+    """
+    Column form of ``to_num``: float array with the same results. Plain numbers are converted
+    in one ``pd.to_numeric`` pass; the remaining cells are parsed once per distinct value,
+    since quantity columns of an export repeat the same texts many times.
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float).fillna(0.0).to_numpy()
+    out = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    # 'nan'/'inf' metinleri ve düz olmayan sayılar tek hücre kurallarına bırakılır
+    present = values.notna().to_numpy()
+    rest = present & ~np.isfinite(out)
+    out[~present] = 0.0
+    if rest.any():
+        codes, uniques = pd.factorize(values[rest])
+        parsed = np.fromiter((to_num(v) for v in uniques), dtype=float, count=len(uniques))
+        out[rest] = parsed[codes]
+    return out
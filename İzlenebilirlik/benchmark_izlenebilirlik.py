@@ -0,0 +1,254 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import importlib.util
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from izlenebilirlik_onbellek import TEXT_COLUMNS
+from izlenebilirlik_indeks import GenealogyIndex
+
+
+def load_script(file_name, module_name):
+    """Import a script whose file name contains spaces (e.g. 'izlenebilirlik V2.4.py')."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(BASE_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_export(n_rows, seed=0):
+    """Build a VERİ-like frame: raw rod coils feed intermediate coils which feed labels."""
+    rng = np.random.default_rng(seed)
+    n_out = max(n_rows // 3, 1)
+    out_codes = np.char.add(np.char.add(rng.integers(10_000_000, 99_999_999, n_out // 40 + 1).astype(str)[
+        rng.integers(0, n_out // 40 + 1, n_out)], '-'), np.arange(n_out).astype(str))
+    n_raw = max(n_out // 10, 1)
+    raw_codes = np.char.add('67300600-', np.arange(n_raw).astype(str))
+
+    out_idx = rng.integers(0, n_out, n_rows)
+    # Girdiler ya daha önce üretilmiş bir ara bobin ya da filmaşin
+    from_raw = rng.random(n_rows) < 0.3
+    in_idx = np.minimum(rng.integers(0, np.maximum(out_idx, 1)), n_out - 1)
+    inputs = np.where(from_raw, raw_codes[rng.integers(0, n_raw, n_rows)], out_codes[in_idx])
+    outputs = out_codes[out_idx]
+
+    processes = np.array(['TCD', 'TV', 'DH', 'PRV', 'HT'])
+    descriptions = np.array(['TV 1.70MM-83HC', 'PRV 1.70MM-83HC', 'HT 0.66MM-CT-KY140',
+                             'TF 5.50MM-1008', '0.45MM-CT-SM (245) YAGLI (MKY)'])
+    machines = np.char.add('M', rng.integers(100, 450, 64).astype(str))
+    df = pd.DataFrame({
+        'OLUŞTURMA ZAMANI': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365 * 86400, n_rows), 's'),
+        'PROSES': processes[rng.integers(0, len(processes), n_rows)].astype(object),
+        'MAKİNE NO': machines[rng.integers(0, len(machines), n_rows)].astype(object),
+        'GİRİŞ ÜRÜN BARKODU': inputs.astype(object),
+        'GİRİŞ ÜRÜN SAP BARKODU': inputs.astype(object),
+        'GİRİŞ ÜRÜN ACIKLAMA': descriptions[rng.integers(0, len(descriptions), n_rows)].astype(object),
+        # MES dökümlerindeki gibi iki ondalıklı miktarlar
+        'GİRİŞ ÜRÜN STOKU': (rng.random(n_rows) * 3000).round(2),
+        'GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg': (rng.random(n_rows) * 3000).round(2),
+        'TEYİT VERİLEN BARKOD': outputs.astype(object),
+        'SAP ETİKET BARKODU': outputs.astype(object),
+        'ÇIKIŞ ÜRÜN ACIKLAMA': descriptions[rng.integers(0, len(descriptions), n_rows)].astype(object),
+        'TEYİT MİKTARI Metre': (rng.random(n_rows) * 30000).round(2),
+        'TEYİT MİKTARI Kg': (rng.random(n_rows) * 3000).round(2),
+    })
+    # load_veri metin sütunlarını object olarak döndürür; ölçüm de aynı tiplerle yapılır
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].astype(object)
+    return df
+
+
+def legacy_dict_graph(df):
+    """Previous V2.4 construction: one Python iteration per row over df.values."""
+    product_graph, product_descriptions, product_machines = {}, {}, {}
+    product_times, product_processes, product_tuketim = {}, {}, {}
+    columns = df.columns.tolist()
+    idx = {c: columns.index(c) for c in columns}
+    for row in df.values:
+        giriş_barkod = row[idx['GİRİŞ ÜRÜN BARKODU']]
+        çıkış_barkod = row[idx['TEYİT VERİLEN BARKOD']]
+        if çıkış_barkod not in product_machines:
+            product_machines[çıkış_barkod] = row[idx['MAKİNE NO']]
+            product_times[çıkış_barkod] = row[idx['OLUŞTURMA ZAMANI']]
+            product_processes[çıkış_barkod] = row[idx['PROSES']]
+        if giriş_barkod not in product_tuketim:
+            product_tuketim[giriş_barkod] = row[idx['GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg']]
+        if çıkış_barkod not in product_graph:
+            product_graph[çıkış_barkod] = []
+        product_graph[çıkış_barkod].append({'parent': giriş_barkod, 'process': row[idx['PROSES']]})
+        if çıkış_barkod not in product_descriptions:
+            product_descriptions[çıkış_barkod] = row[idx['ÇIKIŞ ÜRÜN ACIKLAMA']]
+        if giriş_barkod not in product_descriptions:
+            product_descriptions[giriş_barkod] = row[idx['GİRİŞ ÜRÜN ACIKLAMA']]
+    return product_graph
+
+
+def legacy_row_maps(df):
+    """Previous V0.6 construction: df.iterrows() storing whole Series rows."""
+    output_to_input_map, input_barkod_to_row_map, sap_etiket_to_row_map = {}, {}, {}
+    for _, row in df.iterrows():
+        output_to_input_map.setdefault(row['TEYİT VERİLEN BARKOD'], []).append(row)
+        input_barkod_to_row_map.setdefault(row['GİRİŞ ÜRÜN SAP BARKODU'], row)
+        sap_etiket_to_row_map.setdefault(row['SAP ETİKET BARKODU'], row)
+    return output_to_input_map
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<45} {elapsed:8.2f} sn")
+    return result, elapsed
+
+
+def bench_graph_construction(n_rows, iterrows_limit):
+    print(f"\n=== Graf oluşturma ({n_rows:,} satır sentetik veri) ===")
+    df = synthetic_export(n_rows)
+    v24 = load_script('izlenebilirlik V2.4.py', 'izlenebilirlik_v24')
+
+    _, t_legacy = timed("V2.4 eski (df.values döngüsü)", legacy_dict_graph, df)
+    _, t_new = timed("V2.4 yeni (load_graph, sütun bazlı)", v24.load_graph, df)
+    print(f"  -> hızlanma: {t_legacy / t_new:.1f}x")
+
+    sample = df.iloc[:min(iterrows_limit, n_rows)]
+    _, t_rows = timed(f"V0.6 eski (iterrows, {len(sample):,} satır)", legacy_row_maps, sample)
+    t_rows_full = t_rows * n_rows / len(sample)
+    if len(sample) < n_rows:
+        print(f"  {'V0.6 eski, tüm veri için tahmini':<45} {t_rows_full:8.2f} sn")
+    _, t_index = timed("GenealogyIndex.from_frame (factorize/CSR)", GenealogyIndex.from_frame, df)
+    print(f"  -> hızlanma: {t_rows_full / t_index:.1f}x")
+
+
+def traced_bytes(func, *args):
+    """Python heap bytes still held by the result of ``func`` (tracemalloc)."""
+    tracemalloc.start()
+    result = func(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def bench_memory(n_rows, iterrows_limit):
+    print(f"\n=== Bellek ({n_rows:,} satır sentetik veri) ===")
+    df = synthetic_export(n_rows)
+    sample = df.iloc[:min(iterrows_limit, n_rows)]
+    _, legacy = traced_bytes(legacy_row_maps, sample)
+    legacy_full = legacy * n_rows / len(sample)
+    print(f"  {f'V0.6 eski (Series satırları, {len(sample):,} satır)':<45} {legacy / 2**20:8.1f} MB")
+    if len(sample) < n_rows:
+        print(f"  {'V0.6 eski, tüm veri için tahmini':<45} {legacy_full / 2**20:8.1f} MB")
+    index = GenealogyIndex.from_frame(df)
+    print(f"  {'GenealogyIndex dizileri':<45} {index.nbytes() / 2**20:8.1f} MB")
+    print(f"  ({index.meta['stored_rows']:,} / {n_rows:,} satır saklandı, "
+          f"tüketim {index.row_tuketim.dtype}, metre {index.row_metre.dtype})")
+    print(f"  -> azalma: {legacy_full / index.nbytes():.1f}x")
+
+
+def recursive_rod_content(index, node, amount, acc):
+    """Per-path recursion the mass balance replaces (for comparison only)."""
+    lo, hi = index.up_indptr[node], index.up_indptr[node + 1]
+    if lo == hi:
+        acc[node] = acc.get(node, 0.0) + amount
+        return
+    kg = index.up_kg[lo:hi]
+    total = kg[index.up_indices[lo:hi] != node].sum()
+    for child, part in zip(index.up_indices[lo:hi], kg):
+        if child == node:
+            continue
+        share = part / total if total > 0 else 1.0 / (hi - lo)
+        recursive_rod_content(index, child, amount * share, acc)
+
+
+def bench_mass_balance(n_rows, n_products, recursion_limit=10):
+    from izlenebilirlik_kutle import MassBalance
+
+    print(f"\n=== Kütle dengesi ({n_rows:,} satır, {n_products:,} ürün) ===")
+    index = GenealogyIndex.from_frame(synthetic_export(n_rows))
+    products = index.output_barcodes()[-n_products:]
+    # Yol sayısı derinlikle üstel büyür; özyineleme birkaç üründe ölçülüp ölçeklenir
+    sample = [index.node_id(p) for p in products[:recursion_limit]]
+
+    def recursive():
+        for node in sample:
+            recursive_rod_content(index, node, 1.0, {})
+
+    def sparse_products():
+        balance = MassBalance(index)
+        return sum(len(kg) for _, _, kg in balance.sources_of(products))
+
+    _, t_rec = timed(f"Yol bazlı özyineleme ({len(sample)} ürün)", recursive)
+    t_rec_full = t_rec * len(products) / len(sample)
+    print(f"  {'Özyineleme, tüm ürünler için tahmini':<45} {t_rec_full:8.2f} sn")
+    _, t_sparse = timed("Seyrek matris çarpımı (MassBalance)", sparse_products)
+    print(f"  -> hızlanma: {t_rec_full / t_sparse:.1f}x")
+
+
+def bench_affected(n_rows, n_rods, path_limit=10):
+    from izlenebilirlik_indeks import trace_forwards, trace_affected
+
+    print(f"\n=== Etkilenen mamuller ({n_rows:,} satır, {n_rods:,} hammadde) ===")
+    index = GenealogyIndex.from_frame(synthetic_export(n_rows))
+    feeds = np.flatnonzero((np.diff(index.down_indptr) > 0) & (np.diff(index.up_indptr) == 0))
+    rods = [index.barcode(n) for n in feeds[:n_rods]]
+    # Yol genişletme hammadde başına ayrı yürür; rastgele birkaç hammaddede ölçülüp ölçeklenir
+    rng = np.random.default_rng(0)
+    sample = [rods[i] for i in rng.choice(len(rods), min(path_limit, len(rods)), replace=False)]
+
+    _, t_paths = timed(f"Yol bazlı ileri izleme ({len(sample)} hammadde)",
+                       trace_forwards, index, sample, False)
+    t_paths_full = t_paths * len(rods) / max(len(sample), 1)
+    print(f"  {'Yol bazlı, tüm hammaddeler için tahmini':<45} {t_paths_full:8.2f} sn")
+    rows, t_bfs = timed("Çok kaynaklı BFS (trace_affected)", trace_affected, index, rods, False)
+    print(f"  ({len(rows):,} (hammadde, etiket) çifti)")
+    print(f"  -> hızlanma: {t_paths_full / t_bfs:.1f}x")
+
+
+def bench_extend(n_rows, new_share=0.05):
+    """Time ``extend`` with the last rows against a full rebuild; False when the indexes differ."""
+    print(f"\n=== İndeks genişletme ({n_rows:,} satır, son %{new_share * 100:g} yeni) ===")
+    df = synthetic_export(n_rows)
+    split = int(n_rows * (1 - new_share))
+    base = GenealogyIndex.from_frame(df.iloc[:split].reset_index(drop=True))
+    full, t_full = timed("Tüm satırlardan yeniden kurma (from_frame)", GenealogyIndex.from_frame, df)
+    extended, t_extend = timed("Yalnızca yeni satırlarla genişletme (extend)", base.extend,
+                               df.iloc[split:].reset_index(drop=True))
+    print(f"  -> hızlanma: {t_full / t_extend:.1f}x")
+    different = [name for name in GenealogyIndex.ARRAYS
+                 if not np.array_equal(getattr(full, name), getattr(extended, name),
+                                       equal_nan=getattr(full, name).dtype.kind == 'f')]
+    if different:
+        print(f"  UYUMSUZ diziler: {', '.join(different)}")
+    return not different
+
+
+def main():
+    parser = argparse.ArgumentParser(description="İzlenebilirlik performans ölçümleri")
+    parser.add_argument('--satir', type=int, default=1_000_000, help="Sentetik veri satır sayısı")
+    parser.add_argument('--iterrows-limit', type=int, default=100_000,
+                        help="iterrows ölçümü bu kadar satırla yapılıp tüm veriye ölçeklenir")
+    parser.add_argument('--kutle-urun', type=int, default=2000,
+                        help="Kütle dengesi ölçümündeki ürün sayısı (0: atla)")
+    parser.add_argument('--etkilenen-hammadde', type=int, default=2000,
+                        help="Etkilenen mamul ölçümündeki hammadde sayısı (0: atla)")
+    parser.add_argument('--bellek', action='store_true', help="Bellek ölçümünü de çalıştır")
+    args = parser.parse_args()
+    bench_graph_construction(args.satir, args.iterrows_limit)
+    # Genişletilen indeks tam yeniden kurulumla birebir aynı olmalı
+    if not bench_extend(args.satir):
+        sys.exit(1)
+    if args.bellek:
+        bench_memory(args.satir, args.iterrows_limit)
+    if args.kutle_urun:
+        bench_mass_balance(args.satir, args.kutle_urun)
+    if args.etkilenen_hammadde:
+        bench_affected(args.satir, args.etkilenen_hammadde)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,22 @@
 import pandas as pd
+from izlenebilirlik_onbellek import load_veri
+from izlenebilirlik_cikti import write_results
 
-def create_traceability_report(input_file, output_file):
+def create_traceability_report(input_file, output_file, sheet_name='VERİ'):
     """
-    Bir Excel/CSV dosyasından üretim verilerini okur, izlenebilirlik zinciri oluşturur
-    ve sonuçları yeni bir Excel dosyasına yazar.
+    Bir Excel (VERİ sayfası) veya CSV dosyasından üretim verilerini okur, izlenebilirlik
+    zinciri oluşturur ve sonuçları yeni bir Excel dosyasına yazar.
+
+    Tüketim toplamları tek bir groupby ile hesaplanır; satır başına tablo taraması yapılmaz.
 
     Args:
-        input_file (str): Giriş verilerini içeren dosyanın adı.
+        input_file (str): Giriş verilerini içeren dosyanın adı (.xlsx/.xls veya .csv).
         output_file (str): Oluşturulacak raporun kaydedileceği Excel dosyasının adı.
+        sheet_name (str): Excel girişinde okunacak sayfa (yoksa ilk sayfa).
     """
     try:
-        # 1. Dosyayı oku
-        # HATA DÜZELTMESİ: Türkçe karakterler içeren CSV dosyalarını
-        # doğru okumak için 'encoding="latin1"' parametresi eklendi.
-        # Eğer bu da çalışmazsa, 'iso-8859-9' veya 'cp1254' deneyebilirsiniz.
-        df = pd.read_csv(input_file, encoding="latin1")
+        # 1. Dosyayı oku (CSV için kodlama otomatik denenir, Excel önbellekten gelebilir)
+        df = load_veri(input_file, sheet_name=sheet_name)
         print(f"'{input_file}' dosyası başarıyla okundu.")
 
     except FileNotFoundError:
@@ -24,59 +26,72 @@ def create_traceability_report(input_file, output_file):
         print(f"Dosya okunurken bir hata oluştu: {e}")
         return
 
-    # 2. İzlenebilirlik ve barkod detayları için veri yapılarını oluştur
-    parent_map = {}
+    child_col = 'GİRİŞ ÜRÜN SAP BARKODU'
+    parent_col = 'TEYİT VERİLEN BARKOD'
+
+    # 2. Tek geçişte toplu hesaplar
+    # Her giriş barkodunun (son görülen) çıkış barkodu
+    last_child = df.drop_duplicates(child_col, keep='last')
+    parent_map = dict(zip(last_child[child_col], last_child[parent_col]))
+
+    # Çıkış barkodu başına toplam tüketim: O(n) tek groupby
+    tuketim_by_parent = df.groupby(parent_col)['GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg'].sum().to_dict()
+
+    # 3. Barkod detayları
     barcode_details = {}
 
-    # 3. Veri setini satır satır işle
-    for _, row in df.iterrows():
-        # Kolon adlarının dosyanızdaki ile tam eşleştiğinden emin olun
-        child_barcode = row['GİRİŞ ÜRÜN SAP BARKODU']
-        parent_barcode = row['TEYİT VERİLEN BARKOD']
-
-        parent_map[child_barcode] = parent_barcode
-
-        if child_barcode not in barcode_details:
-            barcode_details[child_barcode] = {
-                'Ürün Açıklaması': row['GİRİŞ ÜRÜN ACIKLAMA'],
-                'Proses': None,
-                'Makine': None,
-                'Oluşturma Zamanı': None,
-                'Tüketim': row['GİRİŞ ÜRÜN STOKU']
-            }
-
-        barcode_details[parent_barcode] = {
-            'Ürün Açıklaması': row['ÇIKIŞ ÜRÜN ACIKLAMA'],
-            'Proses': row['PROSES'],
-            'Makine': row['MAKİNE NO'],
-            'Oluşturma Zamanı': row['OLUŞTURMA ZAMANI'],
-            'Tüketim': df[df['TEYİT VERİLEN BARKOD'] == parent_barcode]['GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg'].sum()
+    # Yalnızca girdi olarak görülen barkodlar hammaddedir (TF); ilk görülen satırın açıklaması
+    parents = set(df[parent_col].dropna())
+    first_child = df.drop_duplicates(child_col, keep='first')
+    first_child = first_child[~first_child[child_col].isin(parents)]
+    for barcode, aciklama in zip(first_child[child_col], first_child['GİRİŞ ÜRÜN ACIKLAMA']):
+        barcode_details[barcode] = {
+            'Ürün Açıklaması': aciklama,
+            'Proses': 'TF',
+            'Makine': None,
+            'Oluşturma Zamanı': None,
+            'Tüketim': 0
+        }
+
+    # Çıkış barkodları: son görülen satırın bilgileri ve toplam tüketim
+    last_parent = df.drop_duplicates(parent_col, keep='last')
+    for barcode, aciklama, proses, makine, zaman in zip(
+            last_parent[parent_col], last_parent['ÇIKIŞ ÜRÜN ACIKLAMA'], last_parent['PROSES'],
+            last_parent['MAKİNE NO'], last_parent['OLUŞTURMA ZAMANI']):
+        barcode_details[barcode] = {
+            'Ürün Açıklaması': aciklama,
+            'Proses': proses,
+            'Makine': makine,
+            'Oluşturma Zamanı': zaman,
+            'Tüketim': tuketim_by_parent.get(barcode, 0)
         }
-        
-    all_barcodes = set(parent_map.keys()) | set(parent_map.values())
-    for barcode in all_barcodes:
-        if barcode not in parent_map.values():
-             if barcode in barcode_details and barcode_details[barcode]['Proses'] is None:
-                 barcode_details[barcode]['Proses'] = 'TF'
-                 barcode_details[barcode]['Tüketim'] = 0
-
-    # 4. İşlem döngüsünü oluşturan fonksiyon
+
+    # 4. İşlem döngüsü: her barkodun zinciri bir kez kurulur ve üst zincirle paylaşılır
+    chains = {}
+
     def get_trace_chain(barcode):
-        chain = []
+        path = []
         current_barcode = barcode
-        while current_barcode in barcode_details:
-            details = barcode_details.get(current_barcode, {})
-            proses = details.get('Proses', 'Bilinmiyor')
-            chain.append(f"{proses} ({current_barcode})")
+        while current_barcode in barcode_details and current_barcode not in chains:
+            if current_barcode in path:
+                print(f"Uyarı: Döngü tespit edildi: {current_barcode}")
+                break
+            path.append(current_barcode)
             if current_barcode in parent_map:
                 current_barcode = parent_map[current_barcode]
             else:
                 break
-        return " -> ".join(chain)
+        tail = chains.get(current_barcode)
+        for code in reversed(path):
+            details = barcode_details.get(code, {})
+            step = f"{details.get('Proses', 'Bilinmiyor')} ({code})"
+            tail = f"{step} -> {tail}" if tail else step
+            chains[code] = tail
+        return chains.get(barcode, "")
 
     # 5. Çıktı verisini hazırla
     output_data = []
-    for barcode in sorted(barcode_details.keys()):
+    for barcode in sorted(b for b in barcode_details if pd.notna(b)):
         details = barcode_details[barcode]
         output_data.append({
             'Barkod': barcode,
@@ -88,22 +103,20 @@ def create_traceability_report(input_file, output_file):
             'İşlem Döngüsü': get_trace_chain(barcode)
         })
 
-    # 6. Sonuçları bir DataFrame'e dönüştür ve Excel'e yaz
-    output_df = pd.DataFrame(output_data)
+    # 6. Sonuçları Excel'e akış halinde yaz
     desired_order = [
-        'Barkod', 'Ürün Açıklaması', 'Makine', 'Tüketim', 
+        'Barkod', 'Ürün Açıklaması', 'Makine', 'Tüketim',
         'Oluşturma Zamanı', 'Proses', 'İşlem Döngüsü'
     ]
-    output_df = output_df[desired_order]
-    output_df.to_excel(output_file, index=False, engine='openpyxl')
+    write_results(output_data, output_file, columns=desired_order, sheet_name='Sheet1')
     print(f"Rapor başarıyla oluşturuldu ve '{output_file}' dosyasına kaydedildi.")
 
 
 # --- KODU ÇALIŞTIR ---
 if __name__ == "__main__":
-    # Girdi dosyasının adını tam olarak yüklediğiniz gibi güncelledim.
+    # Girdi dosyası: Excel (VERİ sayfası) veya CSV olabilir
     input_filename = "79528600-33.xlsx"
-    
+
     output_filename = "izlenebilirlik_raporu.xlsx"
-    
-    create_traceability_report(input_filename, output_filename)
\ No newline at end of file
+
+    create_traceability_report(input_filename, output_filename)
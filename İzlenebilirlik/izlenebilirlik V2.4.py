@@ -1,8 +1,15 @@
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from izlenebilirlik_onbellek import load_veri
+from izlenebilirlik_indeks import PrefixIndex, parse_range
+from izlenebilirlik_cikti import write_results
 
-# Excel dosyasını okuma
+# Excel dosyası (değişmemişse sütunlu önbellekten yüklenir) veya izlenebilirlik_ekleme.py deposu
 file_name = '79528600-33.xlsx'
-df = pd.read_excel(file_name, engine='openpyxl')
+
+# Çok sayıda etiket izlenirken kullanılacak işlem (process) sayısı; 1 ise tek süreçte çalışır
+WORKERS = 1
 
 # Veri yapısı ve sözlükler
 product_graph = {}
@@ -11,118 +18,177 @@ product_machines = {}
 product_times = {}
 product_processes = {}
 product_tuketim = {}  # Giriş barkodlarına göre tüketim bilgilerini saklamak için sözlük
+# Ana kod / aralık aramaları için sıralı indeks; load_graph içinde bir kez kurulur
+prefix_index = None
+
+# Veriyi işleyip sözlükleri doldurma (satır döngüsü yerine sütun bazlı toplu işlemler)
+def load_graph(df):
+    global prefix_index
+    giris = df['GİRİŞ ÜRÜN BARKODU']  # Güncelleme: GİRİŞ ÜRÜN BARKODU
+    cikis = df['TEYİT VERİLEN BARKOD']
+
+    # Çıkış ürününün ilk görülen makine, zaman ve proses bilgilerini kaydet
+    first_out = df.drop_duplicates('TEYİT VERİLEN BARKOD')
+    out_keys = first_out['TEYİT VERİLEN BARKOD'].tolist()
+    product_machines.update(zip(out_keys, first_out['MAKİNE NO'].tolist()))
+    product_times.update(zip(out_keys, first_out['OLUŞTURMA ZAMANI'].tolist()))
+    product_processes.update(zip(out_keys, first_out['PROSES'].tolist()))
 
-# Sütun indekslerini belirleme
-columns = df.columns.tolist()
-olusturma_zamani_index = columns.index('OLUŞTURMA ZAMANI')
-proses_index = columns.index('PROSES')
-makine_no_index = columns.index('MAKİNE NO')
-giris_barkod_index = columns.index('GİRİŞ ÜRÜN BARKODU')  # Güncelleme: GİRİŞ ÜRÜN BARKODU
-giris_sap_barkod_index = columns.index('GİRİŞ ÜRÜN SAP BARKODU')
-giris_aciklama_index = columns.index('GİRİŞ ÜRÜN ACIKLAMA')
-cikis_barkod_index = columns.index('TEYİT VERİLEN BARKOD')
-cikis_aciklama_index = columns.index('ÇIKIŞ ÜRÜN ACIKLAMA')
-tuketim_index = columns.index('GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg')  # Tüketim sütunu indeksi eklendi
-
-# Veriyi işleme
-for row in df.values:
-    giriş_barkod = row[giris_barkod_index]  # Güncelleme: GİRİŞ ÜRÜN BARKODU
-    giriş_sap_barkod = row[giris_sap_barkod_index]
-    giriş_aciklama = row[giris_aciklama_index]
-    çıkış_barkod = row[cikis_barkod_index]
-    çıkış_aciklama = row[cikis_aciklama_index]
-    işlem = row[proses_index]
-    makine_no = row[makine_no_index]
-    olusturma_zamani = row[olusturma_zamani_index]
-    tuketim = row[tuketim_index]  # Tüketim değeri alındı
-    
-    # Çıkış ürününün makine, zaman ve proses bilgilerini kaydet
-    if çıkış_barkod not in product_machines:
-        product_machines[çıkış_barkod] = makine_no
-        product_times[çıkış_barkod] = olusturma_zamani
-        product_processes[çıkış_barkod] = işlem
-    
     # Giriş barkodunun tüketim bilgisini kaydet
     # Güncelleme: İlk gelen tüketim değeri kaydedilir
-    if giriş_barkod not in product_tuketim:
-        product_tuketim[giriş_barkod] = tuketim
-    
-    # Çıkış barkodunun parent'larını kaydet
-    if çıkış_barkod not in product_graph:
-        product_graph[çıkış_barkod] = []
-    product_graph[çıkış_barkod].append({
-        'parent': giriş_barkod,
-        'process': işlem  
-    })
-    
-    # Ürün açıklamalarını kaydet
-    if çıkış_barkod not in product_descriptions:
-        product_descriptions[çıkış_barkod] = çıkış_aciklama
-    if giriş_barkod not in product_descriptions:
-        product_descriptions[giriş_barkod] = giriş_aciklama
+    first_in = df.drop_duplicates('GİRİŞ ÜRÜN BARKODU')
+    product_tuketim.update(zip(first_in['GİRİŞ ÜRÜN BARKODU'].tolist(),
+                               first_in['GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg'].tolist()))
+
+    # Çıkış barkodunun parent'larını satır sırasıyla kaydet: çıkışa göre kararlı sıralanan
+    # girişler tek listeye alınır, her çıkış kendi dilimini alır
+    out_codes, out_keys = pd.factorize(cikis)
+    valid = np.flatnonzero(out_codes >= 0)
+    order = valid[np.argsort(out_codes[valid], kind='stable')]
+    ordered_parents = giris.to_numpy(object)[order].tolist()
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(out_codes[valid], minlength=len(out_keys)))]).tolist()
+    product_graph.update(zip(out_keys.tolist(),
+                             (ordered_parents[a:b] for a, b in zip(bounds[:-1], bounds[1:]))))
+
+    # Ürün açıklamaları: her satırda önce çıkış, sonra giriş; ilk görülen açıklama kalır
+    descriptions = pd.DataFrame({
+        'barkod': np.column_stack([cikis.to_numpy(object), giris.to_numpy(object)]).ravel(),
+        'aciklama': np.column_stack([df['ÇIKIŞ ÜRÜN ACIKLAMA'].to_numpy(object),
+                                     df['GİRİŞ ÜRÜN ACIKLAMA'].to_numpy(object)]).ravel(),
+    }).drop_duplicates('barkod')
+    product_descriptions.update(zip(descriptions['barkod'].tolist(), descriptions['aciklama'].tolist()))
+
+    prefix_index = PrefixIndex.from_barcodes(product_graph.keys())
+
+# Her barkod için bir kez hesaplanan düğüm bilgileri (ortak ara ürünler tekrar hesaplanmaz)
+node_memo = {}
+
+class ProcessChain:
+    """Linked process chain; the 'İşlem Döngüsü' string is built once per chain node, on demand."""
+    __slots__ = ('label', 'parent', '_text')
+
+    def __init__(self, label, parent=None):
+        self.label = label
+        self.parent = parent
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.label if self.parent is None else f"{self.parent.text} -> {self.label}"
+        return self._text
+
+def expand_node(product_code, graph):
+    memo = node_memo.get(product_code)
+    if memo is None:
+        proses = product_processes.get(product_code, "")
+        memo = (
+            product_descriptions.get(product_code, 'Açıklama Bulunamadı'),
+            product_machines.get(product_code, ""),
+            product_tuketim.get(product_code, ""),  # Giriş barkoduna göre tüketim bilgisi
+            product_times.get(product_code, ""),
+            proses,
+            f"{proses} ({product_code})",
+            graph.get(product_code, []),
+        )
+        node_memo[product_code] = memo
+    return memo
 
 # İzlenebilirlik ağacı oluşturma fonksiyonu
 def build_traceability_tree(product_code, root_code, graph, depth=0, process_chain=None):
     result = []
-    if process_chain is None:
-        process_chain = []
-    
-    ürün_aciklama = product_descriptions.get(product_code, 'Açıklama Bulunamadı')
-    depth_indicator = "-" * depth
-    
-    # Makine, zaman, proses ve tüketim bilgilerini al
-    makine = product_machines.get(product_code, "")
-    zaman = product_times.get(product_code, "")
-    proses = product_processes.get(product_code, "")
-    tuketim = product_tuketim.get(product_code, "")  # Giriş barkoduna göre tüketim bilgisi alındı
-    
-    # İşlem döngüsünü oluştur
-    process_path = " -> ".join(process_chain) if process_chain else ""
-    
-    # Ürün bilgilerini ekle
-    result.append({
-        'Barkod': product_code,
-        'Ürün Açıklaması': f"{depth_indicator} {ürün_aciklama}" if depth > 0 else ürün_aciklama,
-        'Makine': makine,
-        'Tüketim': tuketim,  # Giriş barkoduna göre tüketim bilgisi eklendi
-        'Oluşturma Zamanı': zaman,
-        'Proses': proses,  
-        'İşlem Döngüsü': process_path
-    })
-    
-    # Eğer ürünün parent'ları yoksa döndür
-    if product_code not in graph:
-        return result
-    
-    # Parent'ları ekle
-    for entry in graph[product_code]:
-        parent_code = entry['parent']
-        # Prosese ekleme: ürünün kendi prosesini kullan
-        new_process_chain = process_chain.copy()
-        new_process_chain.append(f"{proses} ({product_code})")
-        sub_result = build_traceability_tree(
-            parent_code,
-            root_code,
-            graph,
-            depth + 1,
-            new_process_chain
-        )
-        result.extend(sub_result)
-    
+    chain = None
+    for label in process_chain or []:
+        chain = ProcessChain(label, chain)
+
+    # Özyineleme yerine açık yığın: (giriş/çıkış işareti, barkod, derinlik, işlem zinciri)
+    stack = [(True, product_code, depth, chain)]
+    on_path = set()
+    while stack:
+        entering, code, level, chain = stack.pop()
+        if not entering:
+            on_path.discard(code)
+            continue
+
+        ürün_aciklama, makine, tuketim, zaman, proses, label, parents = expand_node(code, graph)
+        depth_indicator = "-" * level
+
+        # Ürün bilgilerini ekle
+        result.append({
+            'Barkod': code,
+            'Ürün Açıklaması': f"{depth_indicator} {ürün_aciklama}" if level > 0 else ürün_aciklama,
+            'Makine': makine,
+            'Tüketim': tuketim,
+            'Oluşturma Zamanı': zaman,
+            'Proses': proses,
+            'İşlem Döngüsü': chain.text if chain is not None else ""
+        })
+
+        if not parents:
+            continue
+
+        # Parent'ları ekle; prosese ürünün kendi prosesi eklenir
+        on_path.add(code)
+        stack.append((False, code, level, None))
+        child_chain = ProcessChain(label, chain)
+        for parent_code in reversed(parents):
+            if parent_code in on_path:
+                print(f"Uyarı: Döngü tespit edildi, atlanıyor: {code} -> {parent_code}")
+                continue
+            stack.append((True, parent_code, level + 1, child_chain))
+
     return result
 
+# Birden çok kökün ortak yukarı alt grafiğini bir kez açma
+def collect_upstream(roots, graph):
+    upstream = set()
+    stack = list(roots)
+    while stack:
+        code = stack.pop()
+        if code in upstream:
+            continue
+        upstream.add(code)
+        stack.extend(expand_node(code, graph)[-1])
+    return upstream
+
+def _init_worker(memo):
+    node_memo.update(memo)
+
+def _trace_chunk(roots):
+    # İşçi süreçte graf yerine önceden açılmış node_memo kullanılır
+    return {root: build_traceability_tree(root, root, {}) for root in roots}
+
+def trace_roots(roots, graph, workers=1):
+    """Trace several roots over one shared expansion of their upstream subgraph; returns {root: rows}."""
+    upstream = collect_upstream(roots, graph)
+    if workers <= 1 or len(roots) < 2:
+        return {root: build_traceability_tree(root, root, graph) for root in roots}
+
+    memo = {code: node_memo[code] for code in upstream}
+    chunks = [roots[i::workers] for i in range(workers)]
+    tables = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(memo,)) as pool:
+        for part in pool.map(_trace_chunk, chunks):
+            tables.update(part)
+    return {root: tables[root] for root in roots}
+
 # Ana ürün kodunu veya belirli bir varyasyonu bulma ve işleme
-def process_products(base_product_code=None, specific_product_code=None):
+def process_products(base_product_code=None, specific_product_code=None, workers=WORKERS):
     results = []
     
     if base_product_code:
-        # Tüm etiketleri bulma (örneğin, 78378300-1, 78378300-2, vb.)
-        all_etiketler = [code for code in product_graph.keys() if code.startswith(base_product_code)]
+        # Tüm etiketleri bulma (örneğin, 78378300-1, 78378300-2, vb.) veya aralık (78378300-10..-20)
+        rng = parse_range(base_product_code)
+        if rng:
+            all_etiketler = prefix_index.variations(*rng)
+        else:
+            all_etiketler = prefix_index.startswith(base_product_code)
         
+        # Kardeş etiketlerin ortak filmaşin/ara bobinleri tek sefer açılır
+        tables = trace_roots(all_etiketler, product_graph, workers)
         for etiket in all_etiketler:
             print(f"İşleniyor: {etiket}")
-            trace_data = build_traceability_tree(etiket, etiket, product_graph)
-            results.extend(trace_data)
+            results.extend(tables[etiket])
     
     elif specific_product_code:
         # Belirli bir varyasyonu işleme
@@ -135,19 +201,23 @@ def process_products(base_product_code=None, specific_product_code=None):
     
     return results
 
-# Kullanıcıdan veri girişi alma
-base_product_code = input("Tüm varyasyonlarını aramak istediğiniz ana ürün kodunu girin (örn. 77359201) (boş bırakabilirsiniz): ").strip()
-specific_product_code = input("Ya da sadece belirli bir varyasyonu aramak için tam ürün kodunu girin (örn. 77359201-3) (boş bırakabilirsiniz): ").strip()
-
-# Ağacı oluştur ve sonuçları birleştirme
-trace_data = process_products(base_product_code=base_product_code, specific_product_code=specific_product_code)
-
-# DataFrame ve Excel kaydetme
-if trace_data:
-    df_result = pd.DataFrame(trace_data)
-    df_result = df_result[['Barkod', 'Ürün Açıklaması', 'Makine', 'Tüketim', 'Oluşturma Zamanı', 'Proses', 'İşlem Döngüsü']]  # Tüketim sütunu eklendi
-    output_file = f'izlenebilirlik_{base_product_code or specific_product_code}.xlsx'
-    df_result.to_excel(output_file, index=False, engine='openpyxl')
-    print(f"İşlem tamamlandı. Sonuçlar '{output_file}' dosyasına kaydedildi.")
-else:
-    print("Belirtilen ürün kodu için veri bulunamadı veya geçersiz giriş yapıldı.")
\ No newline at end of file
+if __name__ == '__main__':
+    df = load_veri(file_name)
+    load_graph(df)
+
+    # Kullanıcıdan veri girişi alma
+    base_product_code = input("Tüm varyasyonlarını aramak istediğiniz ana ürün kodunu girin (örn. 77359201) (boş bırakabilirsiniz): ").strip()
+    specific_product_code = input("Ya da sadece belirli bir varyasyonu aramak için tam ürün kodunu girin (örn. 77359201-3) (boş bırakabilirsiniz): ").strip()
+
+    # Ağacı oluştur ve sonuçları birleştirme
+    trace_data = process_products(base_product_code=base_product_code, specific_product_code=specific_product_code)
+
+    # DataFrame ve Excel kaydetme
+    if trace_data:
+        df_result = pd.DataFrame(trace_data)
+        df_result = df_result[['Barkod', 'Ürün Açıklaması', 'Makine', 'Tüketim', 'Oluşturma Zamanı', 'Proses', 'İşlem Döngüsü']]  # Tüketim sütunu eklendi
+        output_file = f'izlenebilirlik_{base_product_code or specific_product_code}.xlsx'
+        write_results(df_result, output_file, sheet_name='Sheet1')  # akış halinde, satır sınırında sayfa bölünür
+        print(f"İşlem tamamlandı. Sonuçlar '{output_file}' dosyasına kaydedildi.")
+    else:
+        print("Belirtilen ürün kodu için veri bulunamadı veya geçersiz giriş yapıldı.")
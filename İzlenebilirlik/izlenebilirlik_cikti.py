@@ -0,0 +1,205 @@
+import os
+import re
+import csv
+import math
+from datetime import datetime
+import pandas as pd
+
+# Excel sayfa başına satır sınırı (başlık dahil)
+EXCEL_MAX_ROWS = 1_048_576
+
+OUTPUT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+# Parquet'e bu kadar satırlık parçalar halinde yazılır
+PARQUET_CHUNK_ROWS = 100_000
+
+COLUMN_WIDTHS = {
+    'Barkod': 18,
+    'Ürün Kodu': 18,
+    'Ürün Barkodu': 18,
+    'Hammadde Barkodu': 18,
+    'Hammadde Açıklaması': 40,
+    'Ürün Açıklaması': 40,
+    'Makine': 12,
+    'Makine No': 12,
+    'Tüketim': 15,
+    'Miktar': 15,
+    'Miktar (Kg)': 15,
+    'Oluşturma Zamanı': 20,
+    'Proses': 12,
+    'İşlem Döngüsü': 100,
+    'Sıra': 10,
+    'Üst Sıra': 10,
+    'Derinlik': 10,
+    'Adım': 30,
+    'Hammadde': 18,
+    'Üst Barkod': 18,
+    'Kontrol': 22,
+    'Ayrıntı': 60,
+}
+
+# Ağaç görünümünde her derinlik için girinti
+TREE_INDENT = '    '
+
+
+def _iter_records(data, columns):
+    """Yield value tuples in ``columns`` order from a DataFrame or an iterable of dicts."""
+    if isinstance(data, pd.DataFrame):
+        for values in data[columns].itertuples(index=False, name=None):
+            yield values
+    else:
+        for record in data:
+            yield tuple(record.get(c) for c in columns)
+
+
+def _clean(value):
+    # openpyxl NaN/NaT değerlerini geçersiz hücre olarak yazar; boş hücreye çevir
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _columns_of(data, columns):
+    if columns is not None:
+        return list(columns)
+    if isinstance(data, pd.DataFrame):
+        return list(data.columns)
+    if isinstance(data, list) and data:
+        return list(data[0].keys())
+    return []
+
+
+def write_xlsx(data, output_file, columns=None, sheet_name='İzleme Sonuçları', max_rows=EXCEL_MAX_ROWS):
+    """Stream rows into a write-only workbook, starting a new sheet when one is full."""
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    columns = _columns_of(data, columns)
+    wb = Workbook(write_only=True)
+    sheets = 0
+    ws = None
+    rows_in_sheet = max_rows
+    total = 0
+
+    for values in _iter_records(data, columns):
+        if rows_in_sheet >= max_rows:
+            sheets += 1
+            title = sheet_name if sheets == 1 else f"{sheet_name} {sheets}"
+            ws = wb.create_sheet(title=title[:31])
+            for idx, col in enumerate(columns, 1):
+                ws.column_dimensions[get_column_letter(idx)].width = COLUMN_WIDTHS.get(col, 15)
+            ws.append(columns)
+            rows_in_sheet = 1
+        ws.append([_clean(v) for v in values])
+        rows_in_sheet += 1
+        total += 1
+
+    if ws is None:
+        ws = wb.create_sheet(title=sheet_name[:31])
+        ws.append(columns)
+        sheets = 1
+    wb.save(output_file)
+    return total, sheets
+
+
+def write_csv(data, output_file, columns=None):
+    columns = _columns_of(data, columns)
+    total = 0
+    # utf-8-sig: Excel Türkçe karakterleri doğru açsın
+    with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for values in _iter_records(data, columns):
+            writer.writerow(['' if _clean(v) is None else v for v in values])
+            total += 1
+    return total, 1
+
+
+def write_parquet(data, output_file, columns=None, chunk_rows=PARQUET_CHUNK_ROWS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = _columns_of(data, columns)
+    writer = None
+    total = 0
+    # Şema kesinleşene kadar bekleyen parçalar: ilk parçada tümüyle boş bir sütunun tipi
+    # 'null' olur ve sonraki parçalar o şemaya dönüştürülemez
+    pending = []
+
+    def open_writer():
+        nonlocal writer
+        schema = pa.unify_schemas([table.schema for table in pending])
+        writer = pq.ParquetWriter(output_file, schema)
+        for table in pending:
+            writer.write_table(table.cast(schema))
+        pending.clear()
+
+    def flush(chunk):
+        frame = pd.DataFrame.from_records(chunk, columns=columns)
+        # karışık tipli sütunlarda boş metinleri null yap ki şema tutarlı kalsın
+        for col in frame.columns[frame.dtypes == object]:
+            frame[col] = frame[col].map(lambda v: None if v == '' else v)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is not None:
+            writer.write_table(table.cast(writer.schema))
+            return
+        pending.append(table)
+        if all(any(not pa.types.is_null(t.schema.field(name).type) for t in pending)
+               for name in table.schema.names):
+            open_writer()
+
+    chunk = []
+    for values in _iter_records(data, columns):
+        chunk.append(values)
+        if len(chunk) >= chunk_rows:
+            flush(chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk or (writer is None and not pending):
+        flush(chunk)
+        total += len(chunk)
+    if writer is None:
+        # Hiç değer almayan sütunlar null tipiyle yazılır
+        open_writer()
+    writer.close()
+    return total, 1
+
+
+def write_results(data, output_file, fmt=None, columns=None, sheet_name='İzleme Sonuçları'):
+    """
+    Write trace rows (DataFrame or list of dicts) as xlsx, csv or parquet without building
+    an in-memory workbook. Returns (row count, sheet count).
+    """
+    # Uzantısız çıktı dosyası varsayılan biçimde (xlsx) yazılır
+    fmt = (fmt or os.path.splitext(output_file)[1].lstrip('.') or 'xlsx').lower()
+    if fmt == 'xlsx':
+        return write_xlsx(data, output_file, columns, sheet_name)
+    if fmt == 'csv':
+        return write_csv(data, output_file, columns)
+    if fmt == 'parquet':
+        return write_parquet(data, output_file, columns)
+    raise ValueError(f"Desteklenmeyen çıktı biçimi: {fmt} (seçenekler: {', '.join(OUTPUT_FORMATS)})")
+
+
+def write_tree(data, output_file, indent=TREE_INDENT):
+    """
+    Write parent-pointer rows (depth-first order) as an indented text tree: one line per
+    node, so no ancestor path is repeated. Returns (row count, 1).
+    """
+    columns = ['Derinlik', 'Barkod', 'Proses', 'Ürün Açıklaması', 'Makine', 'Oluşturma Zamanı']
+    total = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for depth, barkod, proses, aciklama, makine, zaman in _iter_records(data, columns):
+            details = ' | '.join(str(v) for v in (aciklama, makine, zaman) if _clean(v) not in (None, ''))
+            proses = f" [{proses}]" if _clean(proses) not in (None, '') else ''
+            f.write(f"{indent * int(depth)}{barkod}{proses}" + (f"  {details}" if details else '') + "\n")
+            total += 1
+    return total, 1
+
+
+def output_file_name(prefix, search_term, fmt='xlsx'):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    safe = re.sub(r'[^\w\-_\. ]', '_', search_term)
+    return f"{prefix}_{safe}_{timestamp}.{fmt}"
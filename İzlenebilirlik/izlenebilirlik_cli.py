@@ -0,0 +1,192 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+from izlenebilirlik_indeks import (load_index, find_target_barcodes, trace_many, materialize_paths,
+                                   read_barcode_file)
+from izlenebilirlik_cikti import write_results, write_tree, output_file_name, OUTPUT_FORMATS
+import izlenebilirlik_sqlite as sqlite_store
+
+# Geriye izleme çıktısı ('yeni izlenebilirlik V0.6.py' ile aynı düzen)
+UP_COLUMNS = ['Barkod', 'Ürün Açıklaması', 'Makine', 'Tüketim', 'Oluşturma Zamanı', 'Proses', 'İşlem Döngüsü']
+
+# İleri izleme çıktısı ('hammadeden mamule v1.1.py' ile aynı düzen)
+DOWN_RENAME = {'Barkod': 'Ürün Kodu', 'Makine': 'Makine No', 'Miktar (Metre)': 'Miktar'}
+DOWN_COLUMNS = ['Ürün Kodu', 'Ürün Açıklaması', 'Miktar', 'Makine No', 'Oluşturma Zamanı', 'Proses', 'İşlem Döngüsü']
+
+# Etkilenen mamuller: her satır çıktığı hammaddeyle etiketlenir, yol genişletilmez
+AFFECTED_COLUMNS = ['Hammadde', 'Ürün Kodu', 'Derinlik', 'Üst Barkod', 'Ürün Açıklaması', 'Miktar', 'Makine No',
+                    'Oluşturma Zamanı', 'Proses']
+
+# Ebeveyn işaretçili düzen: tam yol yerine her satırın kendi adımı ve üst satırı
+POINTER_COLUMNS = ['Sıra', 'Üst Sıra', 'Derinlik']
+LAYOUTS = ('yol', 'ebeveyn', 'agac')
+
+
+def resolve_roots(index, terms, direction, finder=find_target_barcodes):
+    """Expand exact/base/range terms to unique roots, keeping the input order."""
+    roots = []
+    seen = set()
+    for term in terms:
+        found = finder(index, term, verbose=False) if direction == 'up' else [term]
+        if not found:
+            print(f"Uyarı: '{term}' için barkod bulunamadı.")
+        for code in found:
+            if code not in seen:
+                seen.add(code)
+                roots.append(code)
+    return roots
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Toplu izlenebilirlik raporu (etkileşimsiz). Kaynak bir kez yüklenir, "
+                    "tüm barkodlar aynı indeks üzerinden izlenir.")
+    parser.add_argument('kaynak', help="VERİ sayfasını içeren Excel (veya CSV) dosyası, depo klasörü "
+                                       "ya da izlenebilirlik_sqlite.py ile kurulan .db dosyası")
+    parser.add_argument('-b', '--barkod', nargs='+', default=[],
+                        help="Barkodlar: tam (79528600-33), temel (79528600) veya aralık (79528600-10..-20)")
+    parser.add_argument('-f', '--barkod-dosyasi', help="Her satırda bir barkod olan metin dosyası")
+    parser.add_argument('-y', '--yon', choices=['up', 'down'], default='up',
+                        help="up: mamulden hammaddeye, down: hammaddeden mamule (varsayılan: up)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS,
+                        help="Çıktı biçimi (varsayılan: -o uzantısı, yoksa xlsx)")
+    parser.add_argument('-o', '--cikti', help="Çıktı dosyası (varsayılan: zaman damgalı otomatik ad)")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="Paralel işçi süreç sayısı")
+    parser.add_argument('--sayfa', default='VERİ', help="Kaynak Excel sayfa adı")
+    parser.add_argument('--ekle', nargs='+', metavar='DOSYA',
+                        help="İzlemeden önce bu günlük dökümleri 'kaynak' depo klasörüne ekle")
+    parser.add_argument('--duzen', choices=LAYOUTS, default='yol',
+                        help="yol: her satırda tam İşlem Döngüsü (varsayılan); ebeveyn: Sıra/Üst Sıra/"
+                             "Derinlik ve yalnızca satırın adımı; agac: girintili metin ağacı (.txt)")
+    parser.add_argument('--yollar', action='store_true',
+                        help="ebeveyn: satırlara tam İşlem Döngüsü sütununu da ekle (yollar izlemeden "
+                             "sonra tek geçişte kurulur)")
+    parser.add_argument('--etkilenen', action='store_true',
+                        help="down: yollar yerine tek çok kaynaklı BFS ile her hammaddeden üretilen tüm "
+                             "etiketler, hammadde koduyla etiketli (geri çağırma listeleri için)")
+    parser.add_argument('--kutle', action='store_true',
+                        help="Yol listesi yerine kütle dengesi: ürünlerdeki filmaşin kg'ları "
+                             "(up) veya filmaşinin dağıldığı mamuller (down)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    terms = list(args.barkod)
+    if args.barkod_dosyasi:
+        terms.extend(read_barcode_file(args.barkod_dosyasi))
+    if args.ekle:
+        from izlenebilirlik_ekleme import append_extracts
+        missing = [f for f in args.ekle if not os.path.exists(f)]
+        if missing:
+            print(f"Hata: Dosya bulunamadı: {', '.join(missing)}")
+            return 2
+        added = append_extracts(args.kaynak, args.ekle, sheet_name=args.sayfa)
+        print(f"Depoya {added} satır eklendi.")
+        if not terms:
+            return 0
+    if not terms:
+        print("Hata: En az bir barkod (-b) veya barkod dosyası (-f) verilmelidir.")
+        return 2
+    if not os.path.exists(args.kaynak):
+        print(f"Hata: '{args.kaynak}' dosyası bulunamadı.")
+        return 2
+    if args.yollar and args.duzen != 'ebeveyn':
+        print("Hata: --yollar yalnızca '--duzen ebeveyn' ile kullanılabilir.")
+        return 2
+    if args.etkilenen and args.yon != 'down':
+        print("Hata: --etkilenen yalnızca '-y down' ile kullanılabilir.")
+        return 2
+
+    start = time.perf_counter()
+    database = sqlite_store.is_database(args.kaynak)
+    if database:
+        if args.kutle or args.etkilenen:
+            print("Hata: Kütle dengesi ve etkilenen mamul listesi SQLite kaynağıyla desteklenmiyor; "
+                  "Excel veya depo verin.")
+            return 2
+        index = sqlite_store.connect(args.kaynak)
+        roots = resolve_roots(index, terms, args.yon, sqlite_store.find_targets)
+    else:
+        index = load_index(args.kaynak, args.sayfa)
+        roots = resolve_roots(index, terms, args.yon)
+    if not roots:
+        print("Sonuç bulunamadı.")
+        return 1
+
+    if args.kutle:
+        # scipy yalnızca kütle dengesi istendiğinde gerekir
+        from izlenebilirlik_kutle import rod_content, product_content
+        print(f"{len(roots)} kök barkod için kütle dengesi hesaplanıyor ({args.yon})...")
+        df = rod_content(index, roots) if args.yon == 'up' else product_content(index, roots)
+        if df.empty:
+            print("Sonuç bulunamadı.")
+            return 1
+        prefix = 'kutle_dengesi'
+    elif args.etkilenen:
+        print(f"{len(roots)} hammadde için etkilenen mamuller aranıyor ({args.workers} işçi)...")
+        df = trace_many(index, roots, 'affected', args.workers)
+        if df.empty:
+            print("Sonuç bulunamadı.")
+            return 1
+        df = df.rename(columns=DOWN_RENAME)[AFFECTED_COLUMNS]
+        prefix = 'etkilenen_mamuller'
+    else:
+        if database:
+            # Ulaşılan alt grafik veritabanında özyinelemeli CTE (UNION) ile bulunur, sıralama Python'da
+            print(f"{len(roots)} kök barkod izleniyor ({args.yon}, SQLite)...")
+            trace = sqlite_store.trace_backwards if args.yon == 'up' else sqlite_store.trace_forwards
+            rows = trace(index, roots, verbose=False)
+            if args.duzen != 'yol':
+                print("Uyarı: SQLite kaynağında yalnızca 'yol' düzeni desteklenir.")
+        else:
+            print(f"{len(roots)} kök barkod izleniyor ({args.yon}, {args.workers} işçi)...")
+            rows = trace_many(index, roots, args.yon, args.workers, paths=args.duzen == 'yol')
+        if not rows:
+            print("Sonuç bulunamadı.")
+            return 1
+
+        pointers = 'Sıra' in rows[0]
+        if pointers and args.duzen == 'agac':
+            label = terms[0] if len(terms) == 1 else f"{len(terms)}_barkod"
+            prefix = 'uretim_izleme_agaci' if args.yon == 'up' else 'hammadde_mamul_agaci'
+            output_file = args.cikti or output_file_name(prefix, label, 'txt')
+            total, _ = write_tree(rows, output_file)
+            print(f"Ağaç '{output_file}' dosyasına kaydedildi: {total} düğüm "
+                  f"({time.perf_counter() - start:.1f} sn).")
+            return 0
+
+        if pointers and args.yollar:
+            materialize_paths(rows)
+        df = pd.DataFrame(rows)
+        if pointers:
+            # Satırlar derinlik öncelikli sırada kalır; Üst Sıra bu sıraya göre çözülür
+            columns = POINTER_COLUMNS + [c for c in (UP_COLUMNS if args.yon == 'up' else DOWN_COLUMNS)
+                                         if c != 'İşlem Döngüsü'] + ['Adım']
+            if args.yollar:
+                columns.append('İşlem Döngüsü')
+            if args.yon == 'down':
+                df = df.rename(columns=DOWN_RENAME)
+            df = df[columns]
+            prefix = 'uretim_izleme_sonucu' if args.yon == 'up' else 'hammadde_mamul_izlenebilirlik'
+        elif args.yon == 'up':
+            df = df.sort_values(by='İşlem Döngüsü', kind='stable')[UP_COLUMNS]
+            prefix = 'uretim_izleme_sonucu'
+        else:
+            df = df.rename(columns=DOWN_RENAME)[DOWN_COLUMNS]
+            prefix = 'hammadde_mamul_izlenebilirlik'
+
+    label = terms[0] if len(terms) == 1 else f"{len(terms)}_barkod"
+    output_file = args.cikti or output_file_name(prefix, label, args.format or 'xlsx')
+    total, sheets = write_results(df, output_file, args.format)
+    print(f"Sonuç '{output_file}' dosyasına kaydedildi: {total} satır"
+          + (f", {sheets} sayfa" if sheets > 1 else "")
+          + f" ({time.perf_counter() - start:.1f} sn).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import argparse
+from xml.sax.saxutils import escape
+import numpy as np
+import pandas as pd
+from izlenebilirlik_indeks import load_index, NODE_KINDS, exact_array
+
+EXPORT_FORMATS = ('graphml', 'parquet')
+
+# GraphML dosyasına bu kadar satırlık parçalar halinde yazılır
+GRAPHML_CHUNK_ROWS = 50_000
+
+# Kenar türleri: tüketim (giriş -> teyit verilen barkod) ve etiket (giriş -> SAP etiketi)
+EDGE_CONSUMED = 'tuketim'
+EDGE_LABEL = 'etiket'
+
+# (sütun, GraphML tipi); anahtar kimlikleri düğümde 'd_', kenarda 'e_' önekini alır
+NODE_ATTRIBUTES = [('barkod', 'string'), ('cikti', 'boolean'), ('tur', 'string'), ('aciklama', 'string'),
+                   ('makine', 'string'), ('proses', 'string'), ('zaman', 'string'), ('tuketim', 'double'),
+                   ('metre', 'double')]
+EDGE_ATTRIBUTES = [('tur', 'string'), ('kg', 'double'), ('makine', 'string'), ('proses', 'string'),
+                   ('zaman', 'string'), ('metre', 'double')]
+
+
+def node_frame(index):
+    """
+    One row per barcode with the attributes ``get_product_info`` resolves, built with
+    array lookups over the whole index instead of one call per node.
+    """
+    n = len(index)
+    row = np.asarray(index.node_row, dtype=np.int64)
+    kind = np.asarray(index.node_kind)
+    giris = index.texts_at('giris_aciklama', row)
+    cikis = index.texts_at('cikis_aciklama', row)
+    tuketim = index.floats_at('tuketim', row)
+    # Çıktı olmayan düğümlerde eksik tüketim 0 sayılır (get_product_info ile aynı)
+    tuketim = np.where((kind != NODE_KINDS.index('out')) & np.isnan(tuketim), 0.0, tuketim)
+    sap_row = np.asarray(index.sap_row, dtype=np.int64)
+    vocab = np.append(np.asarray(index.vocab_node_proses, dtype=object), None)
+    return pd.DataFrame({
+        'id': np.arange(n),
+        'barkod': index.barcodes_of(np.arange(n)),
+        'cikti': np.asarray(index.out_row) >= 0,
+        'tur': np.append(np.asarray(NODE_KINDS, dtype=object), None)[kind],
+        'aciklama': np.where(np.asarray(index.node_desc_giris), giris, cikis),
+        'makine': index.texts_at('makine', row),
+        'proses': vocab[np.where(row >= 0, np.asarray(index.node_proses), -1)],
+        'zaman': pd.to_datetime(index.times_at(row)),
+        'tuketim': tuketim,
+        'metre': index.floats_at('metre', sap_row),
+    })
+
+
+def edge_frame(index):
+    """
+    Material-flow edge list: ``kaynak`` (input) -> ``hedef`` for every consumption edge
+    (summed kg) and every input -> SAP label edge (attributes of its row).
+    """
+    up_indptr = np.asarray(index.up_indptr)
+    down_indptr = np.asarray(index.down_indptr)
+    up_owner = np.repeat(np.arange(len(index)), np.diff(up_indptr))
+    down_owner = np.repeat(np.arange(len(index)), np.diff(down_indptr))
+    up_rows = np.full(len(up_owner), -1, dtype=np.int64)
+    down_rows = np.asarray(index.down_rows, dtype=np.int64)
+    rows = np.concatenate([up_rows, down_rows])
+    return pd.DataFrame({
+        'kaynak': np.concatenate([np.asarray(index.up_indices, dtype=np.int64), down_owner]),
+        'hedef': np.concatenate([up_owner, np.asarray(index.down_indices, dtype=np.int64)]),
+        'tur': np.repeat(np.asarray([EDGE_CONSUMED, EDGE_LABEL], dtype=object), [len(up_owner), len(down_owner)]),
+        'kg': np.concatenate([exact_array(index.up_kg), np.full(len(down_owner), np.nan)]),
+        'makine': index.texts_at('makine', rows),
+        'proses': index.texts_at('proses', rows),
+        'zaman': pd.to_datetime(index.times_at(rows)),
+        'metre': index.floats_at('metre', rows),
+    })
+
+
+def export_parquet(index, output_prefix):
+    """Write ``<prefix>_dugumler.parquet`` and ``<prefix>_kenarlar.parquet``; returns both paths."""
+    nodes_file = f"{output_prefix}_dugumler.parquet"
+    edges_file = f"{output_prefix}_kenarlar.parquet"
+    node_frame(index).to_parquet(nodes_file, index=False)
+    edges = edge_frame(index)
+    # Analiz araçları için barkodlar kenar listesine de eklenir
+    barcodes = index.barcodes_of(np.arange(len(index)))
+    edges.insert(2, 'kaynak_barkod', barcodes[edges['kaynak'].to_numpy()])
+    edges.insert(3, 'hedef_barkod', barcodes[edges['hedef'].to_numpy()])
+    edges.to_parquet(edges_file, index=False)
+    return nodes_file, edges_file
+
+
+def _graphml_values(frame, attributes, prefix):
+    """The escaped ``<data>`` elements of every row; missing values are left out."""
+    columns = []
+    for name, kind in attributes:
+        values = frame[name]
+        # İndeksin boş işareti NaN/NaT; GraphML'de eksik değer hiç yazılmaz (None)
+        missing = values.isna().to_numpy()
+        if kind == 'boolean':
+            text = np.where(values.to_numpy(), 'true', 'false')
+        elif kind == 'double':
+            text = values.to_numpy().astype(str)
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            text = values.dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy(dtype=object)
+        else:
+            text = values.to_numpy(dtype=object)
+        columns.append([None if m else f'<data key="{prefix}{name}">{escape(str(t))}</data>'
+                        for t, m in zip(text, missing)])
+    return [''.join(c for c in row if c) for row in zip(*columns)] if columns else []
+
+
+def export_graphml(index, output_file, chunk_rows=GRAPHML_CHUNK_ROWS):
+    """Stream the whole genealogy as one directed GraphML graph; returns (nodes, edges)."""
+    nodes = node_frame(index)
+    edges = edge_frame(index)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        for target, prefix, attributes in (('node', 'd_', NODE_ATTRIBUTES), ('edge', 'e_', EDGE_ATTRIBUTES)):
+            for name, kind in attributes:
+                f.write(f'  <key id="{prefix}{name}" for="{target}" attr.name="{name}" attr.type="{kind}"/>\n')
+        f.write('  <graph id="soy_agaci" edgedefault="directed">\n')
+        for lo in range(0, len(nodes), chunk_rows):
+            part = nodes.iloc[lo:lo + chunk_rows]
+            data = _graphml_values(part, NODE_ATTRIBUTES, 'd_')
+            f.writelines(f'    <node id="n{i}">{d}</node>\n' for i, d in zip(part['id'], data))
+        for lo in range(0, len(edges), chunk_rows):
+            part = edges.iloc[lo:lo + chunk_rows]
+            data = _graphml_values(part, EDGE_ATTRIBUTES, 'e_')
+            f.writelines(f'    <edge source="n{s}" target="n{t}">{d}</edge>\n'
+                         for s, t, d in zip(part['kaynak'], part['hedef'], data))
+        f.write('  </graph>\n</graphml>\n')
+    return len(nodes), len(edges)
+
+
+def export_graph(index, output, fmt=None):
+    """Export in ``fmt`` (default: from the output extension); returns the written files."""
+    fmt = (fmt or ('graphml' if output.lower().endswith('.graphml') else 'parquet')).lower()
+    if fmt == 'graphml':
+        export_graphml(index, output)
+        return [output]
+    if fmt == 'parquet':
+        prefix = output[:-len('.parquet')] if output.lower().endswith('.parquet') else output
+        return list(export_parquet(index, prefix))
+    raise ValueError(f"Desteklenmeyen dışa aktarım biçimi: {fmt} (seçenekler: {', '.join(EXPORT_FORMATS)})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Soy ağacının tamamını tek seferde GraphML veya Parquet kenar listesi olarak dışa aktarır.")
+    parser.add_argument('kaynak', help="VERİ sayfasını içeren Excel/CSV dosyası ya da depo klasörü")
+    parser.add_argument('cikti', help="Çıktı: .graphml dosyası ya da Parquet dosya öneki "
+                                      "(<önek>_dugumler.parquet ve <önek>_kenarlar.parquet)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help="Varsayılan: çıktı uzantısından")
+    parser.add_argument('--sayfa', default='VERİ', help="Kaynak Excel sayfa adı")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.kaynak):
+        print(f"Hata: '{args.kaynak}' bulunamadı.")
+        return 2
+    start = time.perf_counter()
+    index = load_index(args.kaynak, args.sayfa)
+    files = export_graph(index, args.cikti, args.format)
+    print(f"{len(index)} düğüm dışa aktarıldı: {', '.join(files)} ({time.perf_counter() - start:.1f} sn).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
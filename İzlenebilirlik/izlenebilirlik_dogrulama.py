@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from izlenebilirlik_onbellek import load_veri
+from izlenebilirlik_indeks import load_index
+from izlenebilirlik_cikti import write_results, output_file_name
+
+COLUMNS = ['Kontrol', 'Barkod', 'Ürün Açıklaması', 'Ayrıntı']
+
+CHECK_CYCLE = 'Döngü'
+CHECK_SELF_LOOP = 'Kendini tüketen'
+CHECK_DANGLING = 'Kaynağı olmayan girdi'
+CHECK_NO_INPUT = 'Girdisiz çıktı'
+CHECK_DUPLICATE = 'Tekrarlanan teyit'
+CHECK_LABEL_CONFLICT = 'Çakışan etiket'
+
+KEY_COLUMNS = ['TEYİT VERİLEN BARKOD', 'GİRİŞ ÜRÜN SAP BARKODU', 'SAP ETİKET BARKODU']
+
+
+def _descriptions(index, nodes):
+    row = np.asarray(index.node_row)[nodes]
+    giris = np.asarray(index.node_desc_giris)[nodes]
+    return [index.text_at('giris_aciklama' if g else 'cikis_aciklama', r) if r >= 0 else ''
+            for r, g in zip(row, giris)]
+
+
+def _node_records(index, check, nodes, details):
+    nodes = np.asarray(nodes, dtype=np.int64)
+    return pd.DataFrame({
+        'Kontrol': check,
+        'Barkod': [index.barcode(n) for n in nodes],
+        'Ürün Açıklaması': _descriptions(index, nodes),
+        'Ayrıntı': details,
+    }, columns=COLUMNS)
+
+
+def find_cycles(index):
+    """
+    Strongly-connected components of the consumption graph in O(V + E) (scipy csgraph).
+
+    Returns (component label per node, mask of nodes in a cycle of two or more barcodes,
+    mask of nodes that consume themselves).
+    """
+    n = len(index)
+    indptr = np.asarray(index.up_indptr)
+    owner = np.repeat(np.arange(n), np.diff(indptr))
+    indices = np.asarray(index.up_indices, dtype=np.int64)
+    self_loop = np.zeros(n, dtype=bool)
+    self_loop[owner[indices == owner]] = True
+    graph = sparse.csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+    _, labels = connected_components(graph, directed=True, connection='strong')
+    sizes = np.bincount(labels)
+    return labels, sizes[labels] > 1, self_loop
+
+
+def check_graph(index):
+    """Graph-level anomalies from the index: cycles, dangling inputs, outputs with no inputs."""
+    frames = []
+    labels, in_cycle, self_loop = find_cycles(index)
+    nodes = np.flatnonzero(in_cycle)
+    if len(nodes):
+        # Her bileşen tek numarayla raporlanır; bileşenler ilk barkodlarına göre sıralanır
+        order = np.lexsort((nodes, labels[nodes]))
+        nodes = nodes[order]
+        component, first = np.unique(labels[nodes], return_index=True)
+        number = np.searchsorted(component, labels[nodes]) + 1
+        sizes = np.diff(np.append(first, len(nodes)))[number - 1]
+        frames.append(_node_records(index, CHECK_CYCLE, nodes,
+                                    [f"Döngü {k} ({s} barkod)" for k, s in zip(number, sizes)]))
+    nodes = np.flatnonzero(self_loop)
+    frames.append(_node_records(index, CHECK_SELF_LOOP, nodes, "Barkod kendi girdisi olarak kayıtlı"))
+
+    out_row = np.asarray(index.out_row)
+    produced = (out_row >= 0) | (np.asarray(index.sap_row) >= 0)
+    proses = np.asarray(index.vocab_node_proses)[np.asarray(index.node_proses)]
+    # Hiç üretilmemiş ve hammadde (TF) olmayan girdiler: döküm başlangıcından önceki
+    # üretimler ya da hatalı okutulmuş barkodlar
+    dangling = (np.asarray(index.in_row) >= 0) & ~produced & (proses != 'TF')
+    nodes = np.flatnonzero(dangling)
+    frames.append(_node_records(index, CHECK_DANGLING, nodes,
+                                [f"Proses: {p}" for p in proses[nodes]]))
+
+    no_input = (out_row >= 0) & (np.diff(np.asarray(index.up_indptr)) == 0)
+    nodes = np.flatnonzero(no_input)
+    frames.append(_node_records(index, CHECK_NO_INPUT, nodes, "Teyit satırlarında giriş barkodu yok"))
+    return frames
+
+
+def check_rows(df):
+    """Row-level anomalies: repeated confirmation rows and SAP labels confirmed for several outputs."""
+    frames = []
+    keys = df[KEY_COLUMNS]
+    repeated = keys[keys.duplicated(keep=False)]
+    if len(repeated):
+        counts = repeated.groupby(KEY_COLUMNS, dropna=False, sort=True).size().reset_index(name='adet')
+        frames.append(pd.DataFrame({
+            'Kontrol': CHECK_DUPLICATE,
+            'Barkod': counts['TEYİT VERİLEN BARKOD'],
+            'Ürün Açıklaması': '',
+            'Ayrıntı': [f"Giriş {g}, etiket {s}: {a} satır"
+                        for g, s, a in zip(counts['GİRİŞ ÜRÜN SAP BARKODU'], counts['SAP ETİKET BARKODU'],
+                                           counts['adet'])],
+        }, columns=COLUMNS))
+
+    labels = df[['SAP ETİKET BARKODU', 'TEYİT VERİLEN BARKOD']].dropna().drop_duplicates()
+    conflict = labels[labels['SAP ETİKET BARKODU'].duplicated(keep=False)]
+    if len(conflict):
+        outputs = conflict.groupby('SAP ETİKET BARKODU', sort=True)['TEYİT VERİLEN BARKOD'].agg(
+            lambda s: ', '.join(map(str, s)))
+        frames.append(pd.DataFrame({
+            'Kontrol': CHECK_LABEL_CONFLICT,
+            'Barkod': outputs.index,
+            'Ürün Açıklaması': '',
+            'Ayrıntı': 'Teyit barkodları: ' + outputs.to_numpy(dtype=object),
+        }, columns=COLUMNS))
+    return frames
+
+
+def validate(index, df=None):
+    """
+    Run every check in linear time over the whole genealogy and return one report frame.
+
+    ``df`` (the VERİ rows) is needed only for the row-level checks, since the index
+    keeps one edge per (input, output) pair.
+    """
+    frames = check_graph(index)
+    if df is not None:
+        frames.extend(check_rows(df))
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def summary(report):
+    """Anomaly counts per check, in report order."""
+    return report.groupby('Kontrol', sort=False).size()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Soy ağacı bütünlük kontrolü: döngüler, kaynağı olmayan girdiler, girdisiz "
+                    "çıktılar ve tekrarlanan teyitler.")
+    parser.add_argument('kaynak', help="VERİ sayfasını içeren Excel/CSV dosyası ya da depo klasörü")
+    parser.add_argument('-o', '--cikti', help="Rapor dosyası (varsayılan: zaman damgalı otomatik ad)")
+    parser.add_argument('--sayfa', default='VERİ', help="Kaynak Excel sayfa adı")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.kaynak):
+        print(f"Hata: '{args.kaynak}' bulunamadı.")
+        return 2
+
+    start = time.perf_counter()
+    index = load_index(args.kaynak, args.sayfa)
+    df = load_veri(args.kaynak, sheet_name=args.sayfa)
+    report = validate(index, df)
+    if report.empty:
+        print(f"Sorun bulunamadı ({len(index)} düğüm, {time.perf_counter() - start:.1f} sn).")
+        return 0
+
+    for check, count in summary(report).items():
+        print(f"  {check}: {count}")
+    label = os.path.splitext(os.path.basename(args.kaynak.rstrip(os.sep)))[0]
+    output_file = args.cikti or output_file_name('soy_agaci_dogrulama', label)
+    total, _ = write_results(report, output_file, sheet_name='Doğrulama')
+    print(f"Rapor '{output_file}' dosyasına kaydedildi: {total} bulgu "
+          f"({time.perf_counter() - start:.1f} sn).")
+    # Döngü varsa izleme sonuçları eksik olabilir; toplu işler bunu çıkış koduyla görür
+    return 1 if (report['Kontrol'] == CHECK_CYCLE).any() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
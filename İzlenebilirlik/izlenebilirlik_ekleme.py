@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from izlenebilirlik_onbellek import (read_source, _write_cache, is_store, read_store_meta, write_store_meta,
+                                     load_store_rows, STORE_PART_PREFIX)
+from izlenebilirlik_indeks import GenealogyIndex, load_index
+
+# Yeni indeks klasörleri bu önekle yazılır; okuyucular eski klasörü açık tutabilir
+STORE_INDEX_PREFIX = 'indeks_'
+
+
+def create_store(store_path):
+    os.makedirs(store_path, exist_ok=True)
+    if not is_store(store_path):
+        write_store_meta(store_path, {'son_zaman': None, 'indeks': None, 'parcalar': []})
+    return read_store_meta(store_path)
+
+
+def remove_stale_indexes(store_path, keep):
+    """
+    Remove index directories other than ``keep``. A directory a reader still has memory-mapped
+    cannot be deleted on Windows; it is reported and retried on the next append.
+    """
+    for name in sorted(os.listdir(store_path)):
+        path = os.path.join(store_path, name)
+        if name.startswith(STORE_INDEX_PREFIX) and name != keep and os.path.isdir(path):
+            try:
+                shutil.rmtree(path)
+            except OSError as e:
+                print(f"Uyarı: Eski indeks silinemedi, sonraki eklemede tekrar denenecek -> {e}")
+
+
+def known_edges(index, df):
+    """Mask of rows whose (input, output) pair is already an edge of ``index``."""
+    n = len(index)
+    out_ids = index.node_ids(df['TEYİT VERİLEN BARKOD'])
+    in_ids = index.node_ids(df['GİRİŞ ÜRÜN SAP BARKODU'])
+    owner = np.repeat(np.arange(n, dtype=np.int64), np.diff(index.up_indptr))
+    edges = owner * n + np.asarray(index.up_indices)
+    return (out_ids >= 0) & (in_ids >= 0) & np.isin(out_ids * n + in_ids, edges)
+
+
+def _pairs(df):
+    return pd.MultiIndex.from_arrays([df['GİRİŞ ÜRÜN SAP BARKODU'], df['TEYİT VERİLEN BARKOD']])
+
+
+def filter_new_rows(df, index, since, pending=None):
+    """
+    Drop rows older than ``since`` and rows whose (input, output) edge is already in the
+    store index or in ``pending`` frames appended earlier in the same run.
+    """
+    zaman = df['OLUŞTURMA ZAMANI']
+    # Son zamanla aynı anda kaydedilmiş satırlar ve zamanı olmayanlar elenmez;
+    # bunlar yalnızca kenar tekrarına göre ayıklanır
+    recent = (zaman.isna() | (zaman >= since)).to_numpy() if since is not None else np.ones(len(df), dtype=bool)
+    df = df[recent]
+    duplicate = np.zeros(len(df), dtype=bool)
+    if index is not None and len(df):
+        duplicate |= known_edges(index, df)
+    if pending and len(df):
+        duplicate |= _pairs(df).isin(_pairs(pd.concat(pending)))
+    return df[~duplicate], int((~recent).sum()), int(duplicate.sum())
+
+
+def append_extracts(store_path, files, since=None, sheet_name='VERİ'):
+    """
+    Append daily extracts to a store directory and extend its genealogy index.
+
+    Only rows not older than the store's last OLUŞTURMA ZAMANI (or ``since``) and whose
+    (input, output) edge is not already stored are kept. Each extract becomes one part
+    file, so existing rows are never re-parsed from Excel. Returns the number of rows added.
+    """
+    meta = create_store(store_path)
+    remove_stale_indexes(store_path, meta['indeks'])
+    index = load_index(store_path) if meta['indeks'] else None
+    if since is None and meta['son_zaman']:
+        since = pd.Timestamp(meta['son_zaman'])
+
+    pending = []
+    for file_path in files:
+        df = read_source(file_path, sheet_name)
+        new, old, duplicate = filter_new_rows(df, index, since, pending)
+        print(f"{os.path.basename(file_path)}: {len(df)} satır okundu, {old} eski satır ve "
+              f"{duplicate} tekrar eden kenar atlandı, {len(new)} satır eklenecek.")
+        if new.empty:
+            continue
+        new = new.reset_index(drop=True)
+        part = f"{STORE_PART_PREFIX}{len(meta['parcalar']) + 1:05d}"
+        _write_cache(new, os.path.join(store_path, part))
+        meta['parcalar'].append({
+            'dosya': part,
+            'kaynak': os.path.basename(file_path),
+            'satir': len(new),
+            'eklenme': datetime.now().isoformat(timespec='seconds'),
+        })
+        pending.append(new)
+
+    if not pending:
+        return 0
+
+    latest = pd.concat([p['OLUŞTURMA ZAMANI'] for p in pending]).max()
+    if since is None or (pd.notna(latest) and latest > since):
+        since = latest
+    meta['son_zaman'] = since.isoformat() if pd.notna(since) else None
+
+    rows = pd.concat(pending, ignore_index=True)
+    name = f"{STORE_INDEX_PREFIX}{len(meta['parcalar']):05d}"
+    if index is not None:
+        # Mevcut indeks yalnızca yeni satırların kenarlarıyla genişletilir
+        print(f"Soy ağacı indeksi güncelleniyor ({len(rows)} yeni satır)...")
+        index.extend(rows).save(os.path.join(store_path, name))
+        # Eski klasörün bellek eşlemeleri silinmeden önce bırakılır
+        index = None
+    else:
+        # Diskteki meta henüz yeni parçaları göstermez; indeks tüm satırlardan bir kez kurulur
+        rows = pd.concat([load_store_rows(store_path), rows], ignore_index=True)
+        print(f"Soy ağacı indeksi oluşturuluyor ({len(rows)} satır)...")
+        GenealogyIndex.from_frame(rows).save(os.path.join(store_path, name))
+    meta['indeks'] = name
+    write_store_meta(store_path, meta)
+    remove_stale_indexes(store_path, name)
+    return sum(len(p) for p in pending)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Günlük MES dökümlerini birikimli depoya ekler ve soy ağacı indeksini günceller.")
+    parser.add_argument('depo', help="Depo klasörü (yoksa oluşturulur)")
+    parser.add_argument('dosyalar', nargs='+', help="Eklenecek Excel/CSV dökümleri (sırayla)")
+    parser.add_argument('--baslangic', help="Yalnızca bu zamandan sonraki satırlar (varsayılan: depodaki son zaman)")
+    parser.add_argument('--sayfa', default='VERİ', help="Kaynak Excel sayfa adı")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    missing = [f for f in args.dosyalar if not os.path.exists(f)]
+    if missing:
+        print(f"Hata: Dosya bulunamadı: {', '.join(missing)}")
+        return 2
+    start = time.perf_counter()
+    since = pd.Timestamp(args.baslangic) if args.baslangic else None
+    added = append_extracts(args.depo, args.dosyalar, since, args.sayfa)
+    print(f"{added} satır eklendi ({time.perf_counter() - start:.1f} sn).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1008 @@
+import os
+import re
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from izlenebilirlik_onbellek import load_veri, cache_base_path, is_store, read_store_meta
+
+INDEX_VERSION = 6
+
+# Satır bazında saklanan metin sütunları (sözlük kodu + kelime dağarcığı olarak)
+ROW_TEXT_COLUMNS = {
+    'proses': 'PROSES',
+    'makine': 'MAKİNE NO',
+    'giris_aciklama': 'GİRİŞ ÜRÜN ACIKLAMA',
+    'cikis_aciklama': 'ÇIKIŞ ÜRÜN ACIKLAMA',
+}
+
+NAT = np.iinfo(np.int64).min
+
+# "79528600-10..-20" veya "79528600-10..20" biçimindeki aralık aramaları
+RANGE_PATTERN = re.compile(r'^(.+)-(\d+)\.\.-?(\d+)$')
+
+# Süreç içinde bir kez yüklenen indeksler (etkileşimli döngüde tekrar okumamak için)
+_LOADED = {}
+
+
+def _encode_keys(values):
+    """Store ASCII barcodes as 1-byte strings (numpy unicode uses 4 bytes per character)."""
+    if values.dtype.kind != 'U' or len(values) == 0:
+        return values
+    try:
+        return np.char.encode(values, 'ascii')
+    except UnicodeEncodeError:
+        return values
+
+
+def _as_key(keys, text):
+    """Convert a query string to the dtype of ``keys``; None when it cannot occur there."""
+    if keys.dtype.kind == 'S':
+        try:
+            return text.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+    return text
+
+
+def _decode(value):
+    return value.decode('ascii') if isinstance(value, bytes) else str(value)
+
+
+class PrefixIndex:
+    """
+    Sorted lookup over output barcodes for base-code searches.
+
+    ``keys`` is sorted lexicographically for ``startswith`` queries. Each key is also
+    split at its last '-' into base code and numeric suffix, and ``(bases, suffixes)``
+    are sorted together so all variations of a base, or a suffix range of it, are a
+    contiguous slice found by binary search: O(log n + k).
+    """
+
+    ARRAYS = ['keys', 'bases', 'suffixes', 'positions']
+
+    def __init__(self, keys, bases, suffixes, positions):
+        self.keys = keys
+        self.bases = bases
+        self.suffixes = suffixes
+        self.positions = positions
+
+    @classmethod
+    def from_barcodes(cls, barcodes):
+        keys = np.unique(np.asarray([b for b in barcodes if isinstance(b, str)], dtype=str))
+        parts = pd.Series(keys, dtype=object).str.rpartition('-')
+        numeric = (parts[1] == '-') & parts[2].str.fullmatch(r'\d+')
+        bases = np.where(numeric, parts[0], '').astype(str)
+        # Sayısal soneki olmayan barkodlar -1 ile işaretlenir ve taban aramasına girmez
+        suffixes = np.where(numeric, pd.to_numeric(parts[2].where(numeric), errors='coerce'), -1).astype(np.int64)
+        order = np.lexsort((suffixes, bases))
+        return cls(_encode_keys(keys), _encode_keys(bases[order]), suffixes[order], order.astype(np.int64))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def startswith(self, prefix):
+        key = _as_key(self.keys, prefix)
+        if key is None:
+            return []
+        lo = np.searchsorted(self.keys, key, 'left')
+        hi = np.searchsorted(self.keys, key + (b'\xff' if isinstance(key, bytes) else '\U0010ffff'), 'left')
+        return [_decode(k) for k in self.keys[lo:hi]]
+
+    def variations(self, base, first=None, last=None):
+        """Return ``base-N`` barcodes ordered by N, optionally limited to first <= N <= last."""
+        base = _as_key(self.bases, base)
+        if base is None:
+            return []
+        lo = np.searchsorted(self.bases, base, 'left')
+        hi = np.searchsorted(self.bases, base, 'right')
+        suffixes = self.suffixes[lo:hi]
+        start = np.searchsorted(suffixes, 0 if first is None else first, 'left')
+        stop = len(suffixes) if last is None else np.searchsorted(suffixes, last, 'right')
+        return [_decode(k) for k in self.keys[self.positions[lo + start:lo + stop]]]
+
+
+def parse_range(search_term):
+    """Split '79528600-10..-20' into ('79528600', 10, 20); None when it is not a range."""
+    m = RANGE_PATTERN.match(search_term)
+    if not m:
+        return None
+    first, last = int(m.group(2)), int(m.group(3))
+    return m.group(1), min(first, last), max(first, last)
+
+
+def read_barcode_file(path):
+    """One barcode per line; commas and '#' comments are allowed."""
+    codes = []
+    with open(path, encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            codes.extend(c.strip() for c in line.split(',') if c.strip())
+    return codes
+
+
+def _int_dtype(upper):
+    """Smallest signed dtype holding ids in [-1, upper)."""
+    return np.int16 if upper < np.iinfo(np.int16).max else np.int32 if upper < np.iinfo(np.int32).max else np.int64
+
+
+def _compact_float(values):
+    """float32 when every value survives the shortest-repr round trip, otherwise float64."""
+    narrow = values.astype(np.float32)
+    back = narrow.astype(str).astype(np.float64)
+    same = (back == values) | (np.isnan(back) & np.isnan(values))
+    return narrow if same.all() else values
+
+
+def _append_float(stored, values):
+    """Append float64 ``values`` to a stored column, keeping float32 while both parts fit it."""
+    stored = np.asarray(stored)
+    if stored.dtype == np.float32:
+        values = _compact_float(values)
+        if values.dtype != np.float32:
+            stored = exact_array(stored)
+    return np.concatenate([stored, values])
+
+
+def _exact(value):
+    # float32 değerler kısa gösterimleri üzerinden float64'e döner (2.3 -> 2.3, 2.29999995 değil)
+    if isinstance(value, np.float32):
+        return float(str(value))
+    return float(value)
+
+
+def exact_array(values):
+    """Vectorized ``_exact``: float64 copy of a stored float32/float64 column."""
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        return values.astype(str).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def _csr(src_ids, dst_ids, n, weights=None):
+    """
+    Deduplicated CSR adjacency src -> dst; edges keep first-seen row order within a source.
+    With ``weights`` the per-row values of every duplicate pair are summed onto its edge.
+    """
+    valid = np.flatnonzero((src_ids >= 0) & (dst_ids >= 0))
+    pair_codes, _ = pd.factorize(src_ids[valid] * n + dst_ids[valid])
+    first = np.zeros(len(valid), dtype=bool)
+    first[np.unique(pair_codes, return_index=True)[1]] = True
+    edge_rows = valid[first]
+    edge_weights = None
+    if weights is not None:
+        edge_weights = np.bincount(pair_codes, weights=weights[valid], minlength=len(edge_rows))
+    # kaynağa göre kararlı sıralama CSR satırlarını oluşturur
+    order = np.argsort(src_ids[edge_rows], kind='stable')
+    edge_rows = edge_rows[order]
+    if edge_weights is not None:
+        edge_weights = edge_weights[order]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src_ids[edge_rows], minlength=n), out=indptr[1:])
+    return indptr, dst_ids[edge_rows], edge_rows, edge_weights
+
+
+def _spread_indptr(indptr, moved, n):
+    """CSR ``indptr`` re-based onto ``n`` ids after each old id ``i`` moved to ``moved[i]``."""
+    counts = np.zeros(n, dtype=np.int64)
+    counts[moved] = np.diff(indptr)
+    spread = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=spread[1:])
+    return spread
+
+
+def _edge_positions(indptr, indices, src, dst, n):
+    """Position of each ``src -> dst`` edge in a CSR adjacency, -1 when it is absent."""
+    owner = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    return pd.Index(owner * n + indices).get_indexer(src * n + dst)
+
+
+def _merge_csr(indptr, indices, values, src, dst, new_values):
+    """
+    Append edges ``src -> dst`` (sorted by src) after the existing edges of each source of a
+    CSR adjacency; returns the merged (indptr, indices, values).
+    """
+    n = len(indptr) - 1
+    old_counts = np.diff(indptr)
+    merged = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(old_counts + np.bincount(src, minlength=n), out=merged[1:])
+    # Eski kenarlar kaynaklarının başında kalır, yeni kenarlar arkalarına eklenir
+    old_pos = np.arange(len(indices)) + np.repeat(merged[:-1] - indptr[:-1], old_counts)
+    new_pos = (merged[:-1] + old_counts)[src] + np.arange(len(src)) - np.searchsorted(src, src)
+    out_indices = np.empty(merged[-1], dtype=np.int64)
+    out_values = np.empty(merged[-1], dtype=np.result_type(values, new_values))
+    out_indices[old_pos], out_values[old_pos] = indices, values
+    out_indices[new_pos], out_values[new_pos] = dst, new_values
+    return merged, out_indices, out_values
+
+
+def _first_rows(ids, n):
+    """Row of the first occurrence of every id in ``ids`` (-1 for ids that never occur)."""
+    rows = np.full(n, -1, dtype=np.int64)
+    valid = np.flatnonzero(ids >= 0)
+    first = ~pd.Series(ids[valid]).duplicated().to_numpy()
+    rows[ids[valid][first]] = valid[first]
+    return rows
+
+
+class GenealogyIndex:
+    """
+    Bidirectional genealogy over interned barcode ids.
+
+    Barcodes are stored sorted, so a barcode's id is its position in ``barcodes`` and
+    lookups are a binary search. ``up_indptr``/``up_indices`` form a CSR adjacency from
+    every output barcode (TEYİT VERİLEN BARKOD) to its input barcodes in first-seen row
+    order, with ``up_kg`` holding the total kg consumed along each edge; ``down_*`` is the
+    forward adjacency from each input to the SAP ETİKET BARKODU labels produced from it,
+    with ``down_rows`` pointing at the row of each edge. Per-node ``*_row`` arrays point
+    to the first row where the barcode appears as output, SAP label or input (-1 when
+    absent); row attributes are kept as compact parallel arrays so the whole index can
+    be saved and memory-mapped.
+    """
+
+    ARRAYS = ['barcodes', 'up_indptr', 'up_indices', 'up_kg', 'down_indptr', 'down_indices', 'down_rows',
+              'out_row', 'sap_row', 'in_row', 'row_tuketim', 'row_metre', 'row_zaman'] + \
+             [f"row_{k}" for k in ROW_TEXT_COLUMNS] + [f"vocab_{k}" for k in ROW_TEXT_COLUMNS] + \
+             [f"prefix_{k}" for k in PrefixIndex.ARRAYS] + \
+             ['node_kind', 'node_row', 'node_desc_giris', 'node_proses', 'vocab_node_proses']
+
+    def __init__(self, arrays, meta=None, path=None):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.prefix = PrefixIndex(*(arrays[f"prefix_{k}"] for k in PrefixIndex.ARRAYS))
+        self.meta = meta or {}
+        # Kaydedildiği klasör; işçi süreçler indeksi buradan bellek eşlemeli açar
+        self.path = path
+
+    def __len__(self):
+        return len(self.barcodes)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the index from a VERİ frame loaded by ``load_veri``."""
+        n_rows = len(df)
+        # Üç barkod sütunu tek seferde karma tabanlı factorize edilir; yalnızca benzersiz
+        # değerler sıralanıp kimlikler sıralı konuma göre yeniden numaralanır
+        stacked = pd.concat([df['TEYİT VERİLEN BARKOD'], df['GİRİŞ ÜRÜN SAP BARKODU'],
+                             df['SAP ETİKET BARKODU']], ignore_index=True)
+        codes, uniques = pd.factorize(stacked)
+        uniques = np.asarray([str(u) for u in uniques], dtype=str)
+        order = np.argsort(uniques, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        barcodes = uniques[order]
+        ids = np.where(codes >= 0, rank[np.maximum(codes, 0)], -1)
+        out_ids, in_ids, sap_ids = ids[:n_rows], ids[n_rows:2 * n_rows], ids[2 * n_rows:]
+        n = len(barcodes)
+
+        tuketim = df['GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg'].to_numpy(dtype=np.float64)
+        up_indptr, up_indices, _, up_kg = _csr(out_ids, in_ids, n, np.nan_to_num(tuketim))
+        down_indptr, down_indices, down_rows, _ = _csr(in_ids, sap_ids, n)
+
+        out_row, sap_row, in_row = (_first_rows(ids, n) for ids in (out_ids, sap_ids, in_ids))
+        # Yalnızca düğümlerin ve ileri kenarların gösterdiği satırlar saklanır; satır
+        # numaraları sıralı kaldığından "ilk görülen" karşılaştırmaları değişmez
+        kept = np.unique(np.concatenate([r[r >= 0] for r in (out_row, sap_row, in_row, down_rows)]))
+        node_dtype = _int_dtype(n)
+        row_dtype = _int_dtype(len(kept))
+
+        def remap(rows):
+            return np.where(rows >= 0, np.searchsorted(kept, rows), -1).astype(row_dtype)
+
+        arrays = {
+            'barcodes': _encode_keys(barcodes),
+            'up_indptr': up_indptr,
+            'up_indices': up_indices.astype(node_dtype),
+            'up_kg': up_kg,
+            'down_indptr': down_indptr,
+            'down_indices': down_indices.astype(node_dtype),
+            'down_rows': remap(down_rows),
+            'out_row': remap(out_row),
+            'sap_row': remap(sap_row),
+            'in_row': remap(in_row),
+            'row_tuketim': _compact_float(tuketim[kept]),
+            'row_metre': _compact_float(df['TEYİT MİKTARI Metre'].to_numpy(dtype=np.float64)[kept]),
+        }
+        rows = df.iloc[kept]
+        zaman = pd.to_datetime(rows['OLUŞTURMA ZAMANI'], errors='coerce')
+        arrays['row_zaman'] = zaman.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        for key, col in ROW_TEXT_COLUMNS.items():
+            # Metinler bir kez sözlüğe alınır; satırda yalnızca küçük tamsayı kodu kalır
+            codes, uniques = pd.factorize(rows[col])
+            arrays[f"row_{key}"] = codes.astype(_int_dtype(len(uniques)))
+            arrays[f"vocab_{key}"] = np.asarray([str(u) for u in uniques], dtype=str)
+
+        arrays.update(resolve_nodes(arrays))
+
+        prefix = PrefixIndex.from_barcodes(barcodes[out_row >= 0])
+        for k in PrefixIndex.ARRAYS:
+            arrays[f"prefix_{k}"] = getattr(prefix, k)
+
+        return cls(arrays, {'version': INDEX_VERSION, 'rows': len(df), 'stored_rows': len(kept), 'nodes': n})
+
+    def extend(self, df):
+        """
+        Index over this index's rows followed by ``df``, equal to ``from_frame`` over all of
+        them but built from ``df`` alone: the key table is re-interned, CSR blocks of the new
+        edges are merged after each source's existing edges and new rows are appended to the
+        stored row columns and vocabularies, so earlier rows are never reloaded.
+        """
+        n_rows = len(df)
+        stacked = pd.concat([df['TEYİT VERİLEN BARKOD'], df['GİRİŞ ÜRÜN SAP BARKODU'],
+                             df['SAP ETİKET BARKODU']], ignore_index=True)
+        codes, uniques = pd.factorize(stacked)
+        uniques = np.asarray([str(u) for u in uniques], dtype=str)
+        old_keys = np.asarray(self.barcodes)
+        if old_keys.dtype.kind == 'S':
+            old_keys = np.char.decode(old_keys, 'ascii')
+        # Birleşik tablo yine sıralıdır; eski kimlikler sıralarını koruyarak kayar
+        barcodes = np.union1d(old_keys, uniques)
+        n = len(barcodes)
+        moved = np.searchsorted(barcodes, old_keys)
+        ids = np.append(np.searchsorted(barcodes, uniques), -1)[codes]
+        out_ids, in_ids, sap_ids = ids[:n_rows], ids[n_rows:2 * n_rows], ids[2 * n_rows:]
+
+        # Tüketim kenarları: eski kenarların yeni satırlardaki kg'ı mevcut toplama eklenir
+        tuketim = df['GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg'].to_numpy(dtype=np.float64)
+        up_indptr = _spread_indptr(self.up_indptr, moved, n)
+        up_indices = moved[np.asarray(self.up_indices, dtype=np.int64)]
+        indptr, indices, _, kg = _csr(out_ids, in_ids, n, np.nan_to_num(tuketim))
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        known = _edge_positions(up_indptr, up_indices, src, indices, n)
+        up_kg = np.array(self.up_kg, dtype=np.float64)
+        up_kg[known[known >= 0]] += kg[known >= 0]
+        new = known < 0
+        up_indptr, up_indices, up_kg = _merge_csr(up_indptr, up_indices, up_kg, src[new], indices[new], kg[new])
+
+        # Etiket kenarları: yalnızca depoda olmayan (giriş, etiket) çiftleri eklenir
+        down_indptr = _spread_indptr(self.down_indptr, moved, n)
+        down_indices = moved[np.asarray(self.down_indices, dtype=np.int64)]
+        indptr, indices, edge_rows, _ = _csr(in_ids, sap_ids, n)
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        new = _edge_positions(down_indptr, down_indices, src, indices, n) < 0
+        src, indices, edge_rows = src[new], indices[new], edge_rows[new]
+
+        # Yeni satırlar eskilerden sonra gelir: yalnızca ilk kez görülen düğümler yeni satırı alır
+        node_rows = {}
+        for name, node_ids in (('out', out_ids), ('sap', sap_ids), ('in', in_ids)):
+            rows = np.full(n, -1, dtype=np.int64)
+            rows[moved] = getattr(self, f"{name}_row")
+            fresh = _first_rows(node_ids, n)
+            fresh[rows >= 0] = -1
+            node_rows[name] = (rows, fresh)
+        kept = np.unique(np.concatenate([fresh[fresh >= 0] for _, fresh in node_rows.values()] + [edge_rows]))
+        stored_rows = len(self.row_zaman)
+        row_dtype = _int_dtype(stored_rows + len(kept))
+
+        def store(rows):
+            return np.where(rows >= 0, stored_rows + np.searchsorted(kept, rows), -1)
+
+        down_indptr, down_indices, down_rows = _merge_csr(
+            down_indptr, down_indices, np.asarray(self.down_rows, dtype=np.int64), src, indices, store(edge_rows))
+
+        node_dtype = _int_dtype(n)
+        arrays = {
+            'barcodes': _encode_keys(barcodes),
+            'up_indptr': up_indptr,
+            'up_indices': up_indices.astype(node_dtype),
+            'up_kg': up_kg,
+            'down_indptr': down_indptr,
+            'down_indices': down_indices.astype(node_dtype),
+            'down_rows': down_rows.astype(row_dtype),
+            'row_tuketim': _append_float(self.row_tuketim, tuketim[kept]),
+            'row_metre': _append_float(self.row_metre, df['TEYİT MİKTARI Metre'].to_numpy(dtype=np.float64)[kept]),
+        }
+        for name, (rows, fresh) in node_rows.items():
+            arrays[f"{name}_row"] = np.where(fresh >= 0, store(fresh), rows).astype(row_dtype)
+        rows = df.iloc[kept]
+        zaman = pd.to_datetime(rows['OLUŞTURMA ZAMANI'], errors='coerce')
+        arrays['row_zaman'] = np.concatenate([self.row_zaman, zaman.to_numpy(dtype='datetime64[ns]').view(np.int64)])
+        for key, col in ROW_TEXT_COLUMNS.items():
+            # Sözlükte olmayan metinler sona eklenir; mevcut kodlar değişmez
+            vocab = np.asarray(getattr(self, f"vocab_{key}"))
+            codes, uniques = pd.factorize(rows[col])
+            uniques = np.asarray([str(u) for u in uniques], dtype=str)
+            pos = pd.Index(vocab).get_indexer(uniques)
+            added = pos < 0
+            pos[added] = len(vocab) + np.arange(added.sum())
+            vocab = np.concatenate([vocab, uniques[added]])
+            codes = np.append(pos, -1)[codes]
+            arrays[f"row_{key}"] = np.concatenate([getattr(self, f"row_{key}"), codes]).astype(_int_dtype(len(vocab)))
+            arrays[f"vocab_{key}"] = vocab
+
+        arrays.update(resolve_nodes(arrays))
+
+        prefix = PrefixIndex.from_barcodes(barcodes[arrays['out_row'] >= 0])
+        for k in PrefixIndex.ARRAYS:
+            arrays[f"prefix_{k}"] = getattr(prefix, k)
+
+        meta = {'version': INDEX_VERSION, 'rows': self.meta.get('rows', 0) + n_rows,
+                'stored_rows': len(arrays['row_zaman']), 'nodes': n}
+        return type(self)(arrays, meta)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        self.path = path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"İndeks sürümü uyumsuz: {meta.get('version')}")
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in cls.ARRAYS}
+        return cls(arrays, meta, path)
+
+    def node_id(self, barcode):
+        """Return the interned id of ``barcode`` or -1 when unknown."""
+        key = _as_key(self.barcodes, barcode)
+        if key is None:
+            return -1
+        i = int(np.searchsorted(self.barcodes, key))
+        if i < len(self.barcodes) and self.barcodes[i] == key:
+            return i
+        return -1
+
+    def node_ids(self, values):
+        """Vectorized ``node_id`` for a column of barcodes (-1 for unknown or missing)."""
+        values = pd.Series(values, dtype=object)
+        present = values.notna().to_numpy()
+        text = values[present].astype(str).to_numpy(dtype=str)
+        if self.barcodes.dtype.kind == 'S' and len(text):
+            try:
+                text = np.char.encode(text, 'ascii')
+            except UnicodeEncodeError:
+                # ASCII olmayan değerler indekste olamaz; boş bayt dizisiyle eşleşmezler
+                text = np.asarray([_as_key(self.barcodes, t) or b'' for t in text], dtype=bytes)
+        ids = np.full(len(values), -1, dtype=np.int64)
+        if len(self.barcodes) and len(text):
+            pos = np.minimum(np.searchsorted(self.barcodes, text), len(self.barcodes) - 1)
+            found = self.barcodes[pos] == text
+            ids[np.flatnonzero(present)[found]] = pos[found]
+        return ids
+
+    def barcode(self, node):
+        return _decode(self.barcodes[node])
+
+    def barcodes_of(self, nodes):
+        """Vectorized ``barcode`` for an array of node ids (object array of str)."""
+        unique, inverse = np.unique(np.asarray(nodes, dtype=np.int64), return_inverse=True)
+        keys = self.barcodes[unique]
+        text = np.char.decode(keys, 'ascii') if keys.dtype.kind == 'S' else keys
+        return text.astype(object)[inverse.reshape(-1)]
+
+    def is_output(self, node):
+        return node >= 0 and self.out_row[node] >= 0
+
+    def inputs(self, node):
+        return self.up_indices[self.up_indptr[node]:self.up_indptr[node + 1]]
+
+    def children(self, node):
+        lo, hi = self.down_indptr[node], self.down_indptr[node + 1]
+        return self.down_indices[lo:hi], self.down_rows[lo:hi]
+
+    def trace_up(self, barcode, verbose=True):
+        """Backward trace (product -> raw material) of an exact or base barcode."""
+        return trace_backwards(self, find_target_barcodes(self, barcode, verbose), verbose)
+
+    def trace_down(self, barcode, verbose=True):
+        """Forward trace (rod coil -> finished labels) of one raw material barcode."""
+        return trace_forwards(self, [barcode], verbose)
+
+    def output_barcodes(self):
+        return [_decode(b) for b in self.barcodes[self.out_row >= 0]]
+
+    def text_at(self, key, row):
+        code = getattr(self, f"row_{key}")[row]
+        if code < 0:
+            return np.nan
+        return str(getattr(self, f"vocab_{key}")[code])
+
+    def time_at(self, row):
+        ns = int(self.row_zaman[row])
+        return pd.NaT if ns == NAT else pd.Timestamp(ns)
+
+    def tuketim_at(self, row):
+        return _exact(self.row_tuketim[row])
+
+    def metre_at(self, row):
+        return _exact(self.row_metre[row])
+
+    def texts_at(self, key, rows):
+        """Vectorized ``text_at`` (NaN for -1 rows and empty cells)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        codes = np.asarray(getattr(self, f"row_{key}"))
+        codes = codes[np.maximum(rows, 0)] if len(codes) else np.full(len(rows), -1)
+        vocab = np.append(np.asarray(getattr(self, f"vocab_{key}"), dtype=object), np.nan)
+        return vocab[np.where((rows >= 0) & (codes >= 0), codes, -1)]
+
+    def times_at(self, rows):
+        """Vectorized ``time_at`` as datetime64 (NaT for -1 rows)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        ns = np.asarray(self.row_zaman)[np.maximum(rows, 0)] if len(self.row_zaman) else np.full(len(rows), NAT)
+        return np.where(rows >= 0, ns, NAT).view('datetime64[ns]')
+
+    def floats_at(self, column, rows):
+        """Vectorized ``tuketim_at``/``metre_at`` for ``column`` 'tuketim' or 'metre' (NaN for -1 rows)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(getattr(self, f"row_{column}"))
+        values = exact_array(values[np.maximum(rows, 0)]) if len(values) else np.full(len(rows), np.nan)
+        return np.where(rows >= 0, values, np.nan)
+
+    def nbytes(self):
+        """Total size of the index arrays in bytes."""
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+
+def index_path_for(file_path, sheet_name='VERİ'):
+    if is_store(file_path):
+        name = read_store_meta(file_path).get('indeks')
+        return os.path.join(file_path, name) if name else None
+    return cache_base_path(file_path, sheet_name) + '.index'
+
+
+def load_index(file_path, sheet_name='VERİ'):
+    """Return the genealogy index for ``file_path``, building and saving it on first use."""
+    if is_store(file_path):
+        # Depo her eklemede yeni indeks klasörü yazar; bellek eşlemeli açmak ucuzdur
+        path = index_path_for(file_path)
+        if path is None:
+            return GenealogyIndex.from_frame(load_veri(file_path))
+        return GenealogyIndex.load(path)
+
+    path = index_path_for(file_path, sheet_name)
+    if path in _LOADED:
+        return _LOADED[path]
+    index = None
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        try:
+            index = GenealogyIndex.load(path)
+        except Exception as e:
+            print(f"Uyarı: İndeks okunamadı, yeniden oluşturulacak -> {e}")
+    if index is None:
+        df = load_veri(file_path, sheet_name)
+        print("Soy ağacı indeksi oluşturuluyor...")
+        index = GenealogyIndex.from_frame(df)
+        try:
+            index.save(path)
+        except Exception as e:
+            print(f"Uyarı: İndeks kaydedilemedi -> {e}")
+    _LOADED.clear()
+    _LOADED[path] = index
+    return index
+
+
+def classify_descriptions(values):
+    """
+    Classify unique texts in one vectorized pass.
+
+    Returns (is_tf, proses_code, is_valid) aligned with ``values``: whether the first word
+    starts with 'TF', the leading alphanumeric run of the first word ('?' when empty), and
+    whether the text is usable at all (not empty and not 'nan').
+    """
+    text = pd.Series(values, dtype=object).astype(str)
+    stripped = text.str.strip().str.lower()
+    usable = ~stripped.isin(['', 'nan'])
+    first_word = text.str.split().str[0].fillna('')
+    is_tf = usable & first_word.str.upper().str.startswith('TF')
+    code = first_word.str.extract(r'^([A-Za-z0-9]*)', expand=False).fillna('')
+    code = code.where(usable & (code != ''), '?')
+    is_valid = (text != '') & (text.str.lower() != 'nan')
+    return is_tf.to_numpy(), code.to_numpy(dtype=object), is_valid.to_numpy()
+
+
+NODE_KINDS = ('out', 'sap', 'in')
+
+
+def resolve_nodes(arrays):
+    """
+    Resolve each node's source row, description and process code once at build time.
+
+    Mirrors the rules of the original per-visit ``get_product_info``: the first output
+    row wins over the SAP label row, which wins over the input row; TF descriptions
+    force 'TF', otherwise PROSES is used and the first token of the description fills
+    in when it is missing. Text is classified per unique vocabulary entry.
+    """
+    kind = np.full(len(arrays['out_row']), -1, dtype=np.int8)
+    row = np.full(len(kind), -1, dtype=arrays['out_row'].dtype)
+    for k, name in reversed(list(enumerate(NODE_KINDS))):
+        rows = arrays[f"{name}_row"]
+        kind = np.where(rows >= 0, k, kind).astype(np.int8)
+        row = np.where(rows >= 0, rows, row)
+    has = row >= 0
+    r = np.where(has, row, 0)
+
+    def lookup(key):
+        codes = arrays[f"row_{key}"][r] if len(arrays[f"row_{key}"]) else np.full(len(r), -1)
+        codes = np.where(has, codes, -1)
+        tf, code, valid = classify_descriptions(arrays[f"vocab_{key}"])
+        vocab = arrays[f"vocab_{key}"].astype(object)
+        # -1 kodu (boş hücre) için sona eklenen NaN girişi
+        pick = np.where(codes >= 0, codes, len(vocab))
+        return (np.append(vocab, np.nan)[pick], np.append(tf, False)[pick],
+                np.append(code, '?')[pick], np.append(valid, False)[pick])
+
+    giris, giris_tf, giris_code, _ = lookup('giris_aciklama')
+    cikis, cikis_tf, cikis_code, cikis_valid = lookup('cikis_aciklama')
+    proses, _, _, proses_valid = lookup('proses')
+
+    is_in = kind == NODE_KINDS.index('in')
+    is_tf = giris_tf | (~is_in & cikis_tf)
+    fallback = np.where(~is_in & cikis_valid, cikis_code, giris_code)
+    resolved = np.where(is_tf, 'TF', np.where(proses_valid, proses, fallback))
+    resolved = np.where(has, resolved, 'Bilinmiyor')
+    codes, uniques = pd.factorize(pd.Series(resolved, dtype=object).astype(str))
+
+    return {
+        'node_kind': kind,
+        'node_row': row,
+        'node_desc_giris': (kind != NODE_KINDS.index('out')) | ~cikis_valid,
+        'node_proses': codes.astype(_int_dtype(len(uniques))),
+        'vocab_node_proses': np.asarray(uniques, dtype=str),
+    }
+
+
+def get_product_info(index, node):
+    """Get product information for a node from the attributes resolved at build time."""
+    row = int(index.node_row[node]) if node >= 0 else -1
+    if row < 0:
+        return {
+            'urun_aciklamasi': 'Bilinmiyor',
+            'makine': 'Bilinmiyor',
+            'tuketim': 0,
+            'olusturma_zamani': '',
+            'proses': 'Bilinmiyor',
+        }
+
+    aciklama = index.text_at('giris_aciklama' if index.node_desc_giris[node] else 'cikis_aciklama', row)
+    tuketim = index.tuketim_at(row)
+    if NODE_KINDS[index.node_kind[node]] != 'out':
+        tuketim = tuketim if pd.notna(tuketim) else 0
+
+    return {
+        'urun_aciklamasi': aciklama,
+        'makine': index.text_at('makine', row),
+        'tuketim': tuketim,
+        'olusturma_zamani': index.time_at(row),
+        'proses': str(index.vocab_node_proses[index.node_proses[node]]),
+    }
+
+
+def format_value(value, value_type='string'):
+    """Format values properly"""
+    if value_type == 'float':
+        if pd.notna(value):
+            return float(value)
+        return 0
+    elif value_type == 'datetime':
+        if pd.notna(value):
+            if isinstance(value, datetime):
+                return value.strftime('%Y-%m-%d %H:%M:%S')
+            else:
+                return str(value)
+        return ''
+    else:
+        if pd.notna(value) and str(value).lower() != 'nan':
+            return str(value)
+        return ''
+
+
+def find_target_barcodes(index, search_term, verbose=True):
+    """Resolve an exact barcode or a base barcode to the output barcodes to trace."""
+    log = print if verbose else (lambda *a, **k: None)
+    rng = parse_range(search_term)
+    if rng:
+        base, first, last = rng
+        log(f"Aralık araması yapılıyor: {base}-{first} .. {base}-{last}")
+        target_barcodes = index.prefix.variations(base, first, last)
+        if not target_barcodes:
+            log(f"Uyarı: {search_term} aralığında barkod bulunamadı.")
+        return target_barcodes
+
+    if '-' in search_term and search_term.endswith(tuple('0123456789')):
+        log(f"Tam barkod araması yapılıyor: {search_term}")
+        if index.is_output(index.node_id(search_term)):
+            return [search_term]
+        log(f"Uyarı: {search_term} barkodu bulunamadı.")
+        return []
+
+    log(f"Temel barkod araması yapılıyor: {search_term}")
+    target_barcodes = index.prefix.variations(search_term)
+    if not target_barcodes:
+        log(f"Uyarı: {search_term} ile başlayan barkod bulunamadı.")
+        return []
+    log(f"Bulunan barkodlar: {target_barcodes}")
+    return target_barcodes
+
+
+def trace_backwards(index, target_barcodes, verbose=True, paths=True):
+    """
+    Walk the index backwards from each target and return the result rows.
+
+    With ``paths=False`` each row carries 'Sıra'/'Üst Sıra'/'Derinlik' parent pointers
+    and its own 'Adım' instead of the full 'İşlem Döngüsü' string, so the output grows
+    linearly with depth; ``materialize_paths`` rebuilds the strings when needed.
+    """
+    results = []
+    for i, barcode in enumerate(target_barcodes, 1):
+        if verbose:
+            print(f"  {i}/{len(target_barcodes)}: {barcode} işleniyor...")
+        visited = set()
+        # Özyineleme yerine açık yığın; sıra özyinelemeli sürümle aynıdır
+        stack = [(index.node_id(barcode), (), -1, 0)]
+        while stack:
+            node, path, parent, depth = stack.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+
+            product_info = get_product_info(index, node)
+            step = f"{product_info['proses']} ({index.barcode(node)})"
+            row = {
+                "Barkod": index.barcode(node),
+                "Ürün Açıklaması": format_value(product_info['urun_aciklamasi']),
+                "Makine": format_value(product_info['makine']),
+                "Tüketim": format_value(product_info['tuketim'], 'float'),
+                "Oluşturma Zamanı": format_value(product_info['olusturma_zamani'], 'datetime'),
+                "Proses": format_value(product_info['proses']),
+            }
+            seq = len(results)
+            if paths:
+                path = path + (step,)
+                row["İşlem Döngüsü"] = " -> ".join(path)
+            else:
+                row = {"Sıra": seq, "Üst Sıra": parent, "Derinlik": depth, **row, "Adım": step}
+            results.append(row)
+
+            for child in reversed(index.inputs(node).tolist()):
+                stack.append((child, path, seq, depth + 1))
+    return results
+
+
+def materialize_paths(rows):
+    """Add 'İşlem Döngüsü' to parent-pointer rows (``paths=False``) in one pass."""
+    paths = []
+    for row in rows:
+        parent = row["Üst Sıra"]
+        prefix = paths[parent] if parent >= 0 else ""
+        step = row["Adım"]
+        paths.append(f"{prefix} -> {step}" if prefix and step else prefix or step)
+        row["İşlem Döngüsü"] = paths[-1]
+    return rows
+
+
+def forward_description(index, node):
+    """Description used by the forward trace: first seen as input or as SAP label."""
+    in_row, sap_row = int(index.in_row[node]), int(index.sap_row[node])
+    if in_row >= 0 and (sap_row < 0 or in_row <= sap_row):
+        return index.text_at('giris_aciklama', in_row)
+    if sap_row >= 0:
+        return index.text_at('cikis_aciklama', sap_row)
+    return 'Açıklama Bulunamadı'
+
+
+def forward_descriptions(index, nodes):
+    """Vectorized ``forward_description``."""
+    nodes = np.asarray(nodes, dtype=np.int64)
+    in_row = np.asarray(index.in_row, dtype=np.int64)[nodes]
+    sap_row = np.asarray(index.sap_row, dtype=np.int64)[nodes]
+    use_in = (in_row >= 0) & ((sap_row < 0) | (in_row <= sap_row))
+    text = np.where(use_in, index.texts_at('giris_aciklama', in_row), index.texts_at('cikis_aciklama', sap_row))
+    return np.where(use_in | (sap_row >= 0), text, 'Açıklama Bulunamadı')
+
+
+def trace_forwards(index, raw_material_codes, verbose=True, paths=True):
+    """
+    Expand the tree of labels produced from each raw material, in 'hammadeden mamule' layout.
+
+    ``paths=False`` emits parent-pointer rows as in ``trace_backwards``; the description
+    then has no depth dashes since 'Derinlik' carries the level.
+    """
+    results = []
+    for code in raw_material_codes:
+        code = code.strip()
+        root = index.node_id(code)
+        if root < 0 or index.down_indptr[root] == index.down_indptr[root + 1]:
+            if verbose:
+                print(f"Belirtilen hammadde kodu ({code}) bulunamadı veya herhangi bir prosesin girdisi değil.")
+            continue
+        if verbose:
+            print(f"İşleniyor: {code}")
+
+        # (giriş/çıkış işareti, düğüm, derinlik, işlem zinciri, kenar etiketi, üst sıra);
+        # döngüler yol üzerinde kesilir
+        stack = [(True, root, 0, (), "", -1)]
+        on_path = set()
+        while stack:
+            entering, node, depth, chain, label, parent = stack.pop()
+            if not entering:
+                on_path.discard(node)
+                continue
+            row = int(index.sap_row[node])
+            aciklama = forward_description(index, node)
+            seq = len(results)
+            record = {
+                'Barkod': index.barcode(node),
+                'Ürün Açıklaması': f"{'-' * depth} {aciklama}" if depth > 0 and paths else aciklama,
+                'Makine': index.text_at('makine', row) if row >= 0 else "",
+                'Oluşturma Zamanı': index.time_at(row) if row >= 0 else "",
+                'Proses': index.text_at('proses', row) if row >= 0 else "",
+                'Miktar (Metre)': index.metre_at(row) if row >= 0 else "",
+            }
+            if paths:
+                record['İşlem Döngüsü'] = " -> ".join(chain)
+            else:
+                record = {'Sıra': seq, 'Üst Sıra': parent, 'Derinlik': depth, **record, 'Adım': label}
+            results.append(record)
+
+            children, edge_rows = index.children(node)
+            if len(children) == 0:
+                continue
+            on_path.add(node)
+            stack.append((False, node, depth, None, None, None))
+            for child, edge_row in zip(reversed(children.tolist()), reversed(edge_rows.tolist())):
+                if child in on_path:
+                    if verbose:
+                        print(f"Uyarı: Döngü tespit edildi, atlanıyor: {index.barcode(node)} -> {index.barcode(child)}")
+                    continue
+                label = f"{index.text_at('proses', edge_row)} ({index.barcode(child)})"
+                stack.append((True, child, depth + 1, chain + (label,) if paths else (), label, seq))
+    return results
+
+
+# Çok kaynaklı BFS ziyaret tablosu (kök x düğüm) bu boyutu aşmayacak kadar kökle kurulur
+BFS_VISITED_BYTES = 64 * 2**20
+
+
+def _bfs_block(indptr, indices, edge_rows, n, roots):
+    source = np.arange(len(roots), dtype=np.int64)
+    node = np.asarray(roots, dtype=np.int64)
+    # (kök, düğüm) ziyaret tablosu; sıralı küme birleştirmesi yerine O(1) erişim
+    visited = np.zeros(len(roots) * n, dtype=bool)
+    visited[source * n + node] = True
+    levels = [(source, node, np.zeros(len(node), dtype=np.int64), np.full(len(node), -1, dtype=np.int64),
+               np.full(len(node), -1, dtype=np.int64))]
+    depth = 0
+    while len(node):
+        counts = indptr[node + 1] - indptr[node]
+        total = int(counts.sum())
+        if total == 0:
+            break
+        depth += 1
+        # Öncü düğümlerin tüm çocuk kenarları tek seferde toplanır
+        offsets = np.repeat(indptr[node] - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        child_source = np.repeat(source, counts)
+        child = indices[offsets]
+        keys = child_source * n + child
+        # Her (kök, düğüm) çifti ilk ulaşan kenarla ve kenar sırasıyla kalır
+        _, first = np.unique(keys, return_index=True)
+        first = np.sort(first[~visited[keys[first]]])
+        visited[keys[first]] = True
+        parent = np.repeat(node, counts)[first]
+        source, node, rows = child_source[first], child[first], edge_rows[offsets[first]]
+        levels.append((source, node, np.full(len(node), depth, dtype=np.int64), parent, rows))
+
+    source, node, depth, parent, rows = (np.concatenate(a) for a in zip(*levels))
+    order = np.argsort(source, kind='stable')
+    return source[order], node[order], depth[order], parent[order], rows[order]
+
+
+def descendants(index, roots):
+    """
+    Multi-source BFS over the forward (input -> SAP label) adjacency.
+
+    ``roots`` are node ids. Returns (source, node, depth, parent, edge_row) arrays with one
+    entry per (root, reachable label) pair, roots included at depth 0; ``source`` is the
+    position in ``roots`` and ``parent``/``edge_row`` the edge that first reached the node
+    (-1 for roots). Each level is expanded for a whole block of roots with CSR gathers, so
+    the cost is linear in the (root, descendant) pairs rather than one walk per root and path.
+    """
+    n = max(len(index), 1)
+    indptr = np.asarray(index.down_indptr, dtype=np.int64)
+    indices = np.asarray(index.down_indices, dtype=np.int64)
+    edge_rows = np.asarray(index.down_rows, dtype=np.int64)
+    block = max(1, BFS_VISITED_BYTES // n)
+    parts = []
+    for lo in range(0, len(roots), block):
+        source, *rest = _bfs_block(indptr, indices, edge_rows, n, roots[lo:lo + block])
+        parts.append((source + lo, *rest))
+    if not parts:
+        return tuple(np.zeros(0, dtype=np.int64) for _ in range(5))
+    return tuple(np.concatenate(a) for a in zip(*parts))
+
+
+def trace_affected(index, raw_material_codes, verbose=True):
+    """
+    Every label produced from each raw material, once per (raw material, label) pair.
+
+    Unlike ``trace_forwards`` no path is expanded: rows are tagged with the originating
+    'Hammadde' and carry the BFS 'Derinlik' and 'Üst Barkod', which suits recalls over
+    long rod lists. Returns a DataFrame built with array lookups (one row per pair).
+    """
+    codes, roots = [], []
+    for code in raw_material_codes:
+        code = code.strip()
+        root = index.node_id(code)
+        if root < 0 or index.down_indptr[root] == index.down_indptr[root + 1]:
+            if verbose:
+                print(f"Belirtilen hammadde kodu ({code}) bulunamadı veya herhangi bir prosesin girdisi değil.")
+            continue
+        codes.append(code)
+        roots.append(root)
+
+    source, node, depth, parent, _ = descendants(index, roots)
+    row = np.asarray(index.sap_row, dtype=np.int64)[node]
+    return pd.DataFrame({
+        'Hammadde': np.asarray(codes, dtype=object)[source],
+        'Barkod': index.barcodes_of(node),
+        'Derinlik': depth,
+        'Üst Barkod': np.where(parent >= 0, index.barcodes_of(np.maximum(parent, 0)), ""),
+        'Ürün Açıklaması': forward_descriptions(index, node),
+        'Makine': index.texts_at('makine', row),
+        'Oluşturma Zamanı': index.times_at(row),
+        'Proses': index.texts_at('proses', row),
+        'Miktar (Metre)': index.floats_at('metre', row),
+    })
+
+
+# İşçi süreç başına bir kez açılan indeks
+_worker_index = None
+
+
+def _init_trace_worker(path):
+    global _worker_index
+    _worker_index = GenealogyIndex.load(path)
+
+
+def _trace(index, roots, direction, paths):
+    if direction == 'up':
+        return trace_backwards(index, roots, verbose=False, paths=paths)
+    if direction == 'affected':
+        return trace_affected(index, roots, verbose=False)
+    return trace_forwards(index, roots, verbose=False, paths=paths)
+
+
+def _trace_chunk(task):
+    direction, roots, paths = task
+    return _trace(_worker_index, roots, direction, paths)
+
+
+def trace_many(index, roots, direction='up', workers=1, paths=True):
+    """
+    Trace many roots ('up': products backwards, 'down': raw materials forwards,
+    'affected': labels reached from each raw material, see ``trace_affected``).
+
+    With ``workers`` > 1 the roots are split into ordered chunks and traced in a process
+    pool; each worker memory-maps the saved index instead of receiving a copy.
+    """
+    if workers <= 1 or len(roots) < 2 or index.path is None:
+        return _trace(index, roots, direction, paths)
+    if direction == 'affected':
+        # Çok kaynaklı BFS parça başına bir tablo döndürür
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_trace_worker,
+                                 initargs=(index.path,)) as pool:
+            size = max(1, -(-len(roots) // workers))
+            tasks = [(direction, roots[i:i + size], paths) for i in range(0, len(roots), size)]
+            return pd.concat(list(pool.map(_trace_chunk, tasks)), ignore_index=True)
+
+    size = max(1, -(-len(roots) // (workers * 4)))
+    tasks = [(direction, roots[i:i + size], paths) for i in range(0, len(roots), size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_trace_worker,
+                             initargs=(index.path,)) as pool:
+        for part in pool.map(_trace_chunk, tasks):
+            if not paths:
+                # Parça içi sıra numaraları birleşik listeye kaydırılır
+                offset = len(results)
+                for row in part:
+                    row['Sıra'] += offset
+                    if row['Üst Sıra'] >= 0:
+                        row['Üst Sıra'] += offset
+            results.extend(part)
+    return results
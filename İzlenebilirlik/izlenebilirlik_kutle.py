@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from izlenebilirlik_indeks import get_product_info
+
+# Döngülü veride yayılım bu kadar adımdan sonra kesilir
+MAX_DEPTH = 256
+
+# Bellek sınırlı kalsın diye kökler bu büyüklükte gruplar halinde yayılır
+CHUNK_ROOTS = 2000
+
+COLUMNS = ['Ürün Barkodu', 'Ürün Açıklaması', 'Hammadde Barkodu', 'Hammadde Açıklaması',
+           'Miktar (Kg)', 'Oran']
+
+
+class MassBalance:
+    """
+    Proportional mass balance over the genealogy index.
+
+    ``share[o, i]`` is the fraction of the kg consumed by output ``o`` that came from
+    input ``i`` (summed GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg per edge). The kg of source ``r``
+    in product ``y`` is ``mass[y] * (S + S^2 + ...)[y, r]``: each output's consumption is
+    split over its inputs, then over their inputs, down to barcodes that have no inputs
+    (rod coils). The series is evaluated as repeated sparse products over blocks of
+    roots, so thousands of products or rods are answered in one pass.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        n = len(index)
+        indptr = np.asarray(index.up_indptr)
+        owner = np.repeat(np.arange(n), np.diff(indptr))
+        indices = np.asarray(index.up_indices)
+        kg = np.clip(np.asarray(index.up_kg, dtype=np.float64), 0, None)
+        # Kendini tüketen kayıtlar (giriş = çıkış) paylaştırmaya katılmaz
+        keep = indices != owner
+        owner, indices, kg = owner[keep], indices[keep], kg[keep]
+        counts = np.bincount(owner, minlength=n)
+        # Her çıktının girdilerinden tükettiği toplam kg
+        self.mass = np.bincount(owner, weights=kg, minlength=n)
+        # Tüketimi kayıtlı olmayan çıktılarda girdiler eşit paylaştırılır
+        owner_mass = self.mass[owner]
+        share = np.where(owner_mass > 0, kg / np.where(owner_mass > 0, owner_mass, 1), 1.0 / counts[owner])
+        self.share = sparse.csr_matrix((share, (owner, indices)), shape=(n, n))
+        self.share_t = self.share.T.tocsr()
+        self.is_source = counts == 0
+        consumed = np.zeros(n, dtype=bool)
+        consumed[indices] = True
+        self.is_final = (counts > 0) & ~consumed
+
+    def _propagate(self, start, matrix):
+        """Return start @ (I + M + M^2 + ...) for a sparse block of start rows."""
+        total = start
+        current = start
+        for _ in range(MAX_DEPTH):
+            current = current @ matrix
+            current.eliminate_zeros()
+            if current.nnz == 0:
+                return total
+            total = total + current
+        print(f"Uyarı: {MAX_DEPTH} adımda yayılım bitmedi, soy ağacında döngü olabilir.")
+        return total
+
+    def _ids(self, barcodes):
+        ids = []
+        for code in barcodes:
+            node = self.index.node_id(code)
+            if node < 0:
+                print(f"Uyarı: {code} barkodu bulunamadı.")
+            else:
+                ids.append(node)
+        return np.asarray(ids, dtype=np.int64)
+
+    def sources_of(self, products):
+        """Yield (product id, source id, kg) blocks: rod content of each product (backward)."""
+        ids = self._ids(products)
+        for lo in range(0, len(ids), CHUNK_ROOTS):
+            block = ids[lo:lo + CHUNK_ROOTS]
+            # Başlangıç: ürünün doğrudan girdilerinden tükettiği kg
+            start = sparse.diags(self.mass[block]) @ self.share[block]
+            total = self._propagate(start.tocsr(), self.share).tocoo()
+            keep = self.is_source[total.col] & (total.data > 0)
+            yield block[total.row[keep]], total.col[keep], total.data[keep]
+
+    def products_of(self, sources, only_final=True):
+        """Yield (product id, source id, kg) blocks: how each rod spread forward."""
+        ids = self._ids(sources)
+        for lo in range(0, len(ids), CHUNK_ROOTS):
+            block = ids[lo:lo + CHUNK_ROOTS]
+            # S^T satırları: kaynağı doğrudan tüketen çıktılar ve oranları
+            total = self._propagate(self.share_t[block], self.share_t).tocoo()
+            kg = total.data * self.mass[total.col]
+            keep = kg > 0
+            if only_final:
+                keep &= self.is_final[total.col]
+            yield total.col[keep], block[total.row[keep]], kg[keep]
+
+    def frame(self, blocks):
+        """Collect (product, source, kg) blocks into a report frame."""
+        parts = [pd.DataFrame({'urun': p, 'kaynak': s, 'kg': kg}) for p, s, kg in blocks]
+        df = pd.concat(parts, ignore_index=True) if parts else \
+            pd.DataFrame({'urun': [], 'kaynak': [], 'kg': []})
+        df = df.astype({'urun': np.int64, 'kaynak': np.int64})
+        descriptions = {node: get_product_info(self.index, node)['urun_aciklamasi']
+                        for node in pd.unique(pd.concat([df['urun'], df['kaynak']]))}
+        return pd.DataFrame({
+            'Ürün Barkodu': [self.index.barcode(n) for n in df['urun']],
+            'Ürün Açıklaması': df['urun'].map(descriptions),
+            'Hammadde Barkodu': [self.index.barcode(n) for n in df['kaynak']],
+            'Hammadde Açıklaması': df['kaynak'].map(descriptions),
+            'Miktar (Kg)': df['kg'].round(3),
+            'Oran': (df['kg'] / self.mass[df['urun']]).round(6),
+        }, columns=COLUMNS)
+
+
+def rod_content(index, products):
+    """Kg of every rod coil in each product barcode."""
+    balance = MassBalance(index)
+    return balance.frame(balance.sources_of(products))
+
+
+def product_content(index, sources, only_final=True):
+    """Kg of each rod coil that ended up in every downstream (finished) product."""
+    balance = MassBalance(index)
+    return balance.frame(balance.products_of(sources, only_final))
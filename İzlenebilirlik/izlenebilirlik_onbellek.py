@@ -0,0 +1,223 @@
+import os
+import re
+import glob
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Önbellek dosyaları kaynak Excel'in yanındaki bu klasörde tutulur
+CACHE_DIR_NAME = '.izlenebilirlik_onbellek'
+
+# Önbellek biçimi değiştiğinde eski dosyalar geçersiz olsun diye anahtara eklenir
+CACHE_VERSION = 1
+
+# İzleme betiklerinin gerçekten kullandığı sütunlar; diğerleri hiç saklanmaz
+USED_COLUMNS = [
+    'OLUŞTURMA ZAMANI',
+    'PROSES',
+    'MAKİNE NO',
+    'GİRİŞ ÜRÜN BARKODU',
+    'GİRİŞ ÜRÜN SAP BARKODU',
+    'GİRİŞ ÜRÜN ACIKLAMA',
+    'GİRİŞ ÜRÜN STOKU',
+    'GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg',
+    'TEYİT VERİLEN BARKOD',
+    'SAP ETİKET BARKODU',
+    'ÇIKIŞ ÜRÜN ACIKLAMA',
+    'TEYİT MİKTARI Metre',
+    'TEYİT MİKTARI Kg',
+]
+
+# Excel'de sayı olarak gelebilen ama metin olarak karşılaştırılan sütunlar
+TEXT_COLUMNS = [
+    'PROSES',
+    'MAKİNE NO',
+    'GİRİŞ ÜRÜN BARKODU',
+    'GİRİŞ ÜRÜN SAP BARKODU',
+    'GİRİŞ ÜRÜN ACIKLAMA',
+    'TEYİT VERİLEN BARKOD',
+    'SAP ETİKET BARKODU',
+    'ÇIKIŞ ÜRÜN ACIKLAMA',
+]
+
+CSV_ENCODINGS = ['utf-8-sig', 'cp1254']
+
+# Günlük dökümlerin biriktirildiği depo klasörünün içeriği (izlenebilirlik_ekleme.py)
+STORE_META = 'depo.json'
+STORE_PART_PREFIX = 'parca_'
+
+NUMERIC_COLUMNS = [
+    'GİRİŞ ÜRÜN STOKU',
+    'GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg',
+    'TEYİT MİKTARI Metre',
+    'TEYİT MİKTARI Kg',
+]
+
+
+def source_signature(file_path, sheet_name='VERİ'):
+    """Return a short key derived from the source path, size, mtime and sheet."""
+    st = os.stat(file_path)
+    raw = f"{os.path.abspath(file_path)}|{st.st_size}|{st.st_mtime_ns}|{sheet_name}|{CACHE_VERSION}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def cache_dir_for(file_path):
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+
+
+def cache_base_path(file_path, sheet_name='VERİ'):
+    """Return the cache path prefix (without extension) for the current state of the source."""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir_for(file_path), f"{stem}_{source_signature(file_path, sheet_name)}")
+
+
+def _as_text(value):
+    if pd.isna(value):
+        return np.nan
+    # 144177.0 gibi Excel'in float'a çevirdiği barkodları tam sayı metnine döndür
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _normalize(df):
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].map(_as_text).astype(object)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if 'OLUŞTURMA ZAMANI' in df.columns:
+        df['OLUŞTURMA ZAMANI'] = pd.to_datetime(df['OLUŞTURMA ZAMANI'], errors='coerce')
+    return df
+
+
+def read_source(file_path, sheet_name='VERİ'):
+    """Read only USED_COLUMNS from the workbook (or CSV) without touching the cache."""
+    usecols = lambda c: c in USED_COLUMNS
+    if file_path.lower().endswith('.csv'):
+        df = None
+        # Türkçe başlıklar için önce UTF-8, sonra Windows-1254 dene; son çare latin1
+        for encoding in CSV_ENCODINGS:
+            try:
+                df = pd.read_csv(file_path, usecols=usecols, encoding=encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        if df is None:
+            df = pd.read_csv(file_path, usecols=usecols, encoding='latin1')
+    else:
+        try:
+            df = pd.read_excel(file_path, sheet_name=sheet_name, usecols=usecols, engine='openpyxl')
+        except ValueError:
+            # belirtilen sayfa yoksa ilk sayfayı oku
+            df = pd.read_excel(file_path, sheet_name=0, usecols=usecols, engine='openpyxl')
+    return _normalize(df)
+
+
+def _write_cache(df, base_path):
+    try:
+        df.to_parquet(base_path + '.parquet', index=False)
+        return base_path + '.parquet'
+    except ImportError:
+        # pyarrow/fastparquet yoksa pickle ile devam et
+        df.to_pickle(base_path + '.pkl')
+        return base_path + '.pkl'
+
+
+def _read_cache(base_path):
+    if os.path.exists(base_path + '.parquet'):
+        try:
+            return _normalize(pd.read_parquet(base_path + '.parquet'))
+        except ImportError:
+            pass
+    if os.path.exists(base_path + '.pkl'):
+        return pd.read_pickle(base_path + '.pkl')
+    return None
+
+
+def _remove_stale(cache_dir, stem, keep_key):
+    # aynı kaynağa ait eski anahtarlı dosyaları sil (stem_<16 hane>.uzantı)
+    pattern = re.compile(re.escape(stem) + r'_[0-9a-f]{16}\.')
+    for path in glob.glob(os.path.join(cache_dir, glob.escape(stem) + '_*')):
+        name = os.path.basename(path)
+        if pattern.match(name) and keep_key not in name:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def is_store(path):
+    """True when ``path`` is an append-only store directory instead of a workbook."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, STORE_META))
+
+
+def read_store_meta(store_path):
+    with open(os.path.join(store_path, STORE_META), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_store_meta(store_path, meta):
+    # Yarım yazılmış bir meta dosyası okuyucuların önüne çıkmasın
+    tmp = os.path.join(store_path, STORE_META + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, os.path.join(store_path, STORE_META))
+
+
+def load_store_rows(store_path):
+    """Concatenate the appended parts of a store in the order they were added."""
+    parts = [_read_cache(os.path.join(store_path, part['dosya']))
+             for part in read_store_meta(store_path)['parcalar']]
+    parts = [df for df in parts if df is not None]
+    if not parts:
+        return _normalize(pd.DataFrame(columns=USED_COLUMNS))
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_veri(file_path, sheet_name='VERİ', use_cache=True):
+    """
+    Load the consumption export, reusing a columnar cache when the source is unchanged.
+
+    The cache key is built from the absolute path, file size and mtime, so editing or
+    replacing the workbook triggers a single re-parse on the next run. A store directory
+    built by ``izlenebilirlik_ekleme.py`` is read from its appended parts instead.
+    """
+    if is_store(file_path):
+        df = load_store_rows(file_path)
+        print(f"Depodan yüklendi: {os.path.basename(os.path.abspath(file_path))} ({len(df)} satır)")
+        return df
+
+    if not use_cache:
+        return read_source(file_path, sheet_name)
+
+    key = source_signature(file_path, sheet_name)
+    cache_dir = cache_dir_for(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    base_path = cache_base_path(file_path, sheet_name)
+
+    try:
+        df = _read_cache(base_path)
+    except Exception as e:
+        print(f"Uyarı: Önbellek okunamadı, kaynak yeniden okunacak -> {e}")
+        df = None
+    if df is not None:
+        print(f"Önbellekten yüklendi: {os.path.basename(file_path)} ({len(df)} satır)")
+        return df
+
+    print(f"Kaynak dosya okunuyor (ilk seferde uzun sürebilir): {file_path}")
+    df = read_source(file_path, sheet_name)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _remove_stale(cache_dir, stem, key)
+        written = _write_cache(df, base_path)
+        print(f"Önbellek oluşturuldu: {written}")
+    except Exception as e:
+        print(f"Uyarı: Önbellek yazılamadı -> {e}")
+    return df
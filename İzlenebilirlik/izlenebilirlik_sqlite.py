@@ -0,0 +1,327 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from izlenebilirlik_onbellek import source_signature
+from izlenebilirlik_indeks import (load_index, get_product_info, format_value, forward_description,
+                                   parse_range)
+
+DB_VERSION = 1
+
+DB_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+SCHEMA = """
+CREATE TABLE bilgi (anahtar TEXT PRIMARY KEY, deger TEXT);
+
+-- Düğüm başına çözülmüş öznitelikler (yeni izlenebilirlik V0.6 ile aynı öncelik kuralı)
+CREATE TABLE dugumler (
+    id INTEGER PRIMARY KEY,
+    barkod TEXT NOT NULL UNIQUE,
+    cikti INTEGER NOT NULL,
+    taban TEXT,
+    sonek INTEGER,
+    aciklama TEXT,
+    makine TEXT,
+    tuketim REAL,
+    zaman TEXT,
+    proses TEXT,
+    adim TEXT,
+    ileri_aciklama TEXT,
+    etiketli INTEGER NOT NULL,
+    etiket_makine TEXT,
+    etiket_zaman TEXT,
+    etiket_proses TEXT,
+    metre REAL
+);
+
+-- Çıkış -> giriş kenarları, girişlerin ilk görülme sırasıyla
+CREATE TABLE yukari (
+    cikis INTEGER NOT NULL,
+    sira INTEGER NOT NULL,
+    giris INTEGER NOT NULL,
+    kg REAL,
+    PRIMARY KEY (cikis, sira)
+) WITHOUT ROWID;
+
+-- Giriş -> SAP etiketi kenarları ('hammadeden mamule' ileri izleme)
+CREATE TABLE asagi (
+    giris INTEGER NOT NULL,
+    sira INTEGER NOT NULL,
+    cikis INTEGER NOT NULL,
+    etiket TEXT,
+    PRIMARY KEY (giris, sira)
+) WITHOUT ROWID;
+"""
+
+INDEXES = """
+CREATE INDEX dugumler_taban ON dugumler (taban, sonek) WHERE taban IS NOT NULL;
+CREATE INDEX yukari_giris ON yukari (giris);
+CREATE INDEX asagi_cikis ON asagi (cikis);
+"""
+
+# Kökten ulaşılan düğümler özyinelemeli CTE ile bulunur; UNION tekrar edenleri attığı için
+# her düğüm bir kez genişletilir (iş doğrusal kalır). Alt grafiğin kenarları ve düğümleri
+# birer birleştirmeyle okunur, ön-sıra yalnızca çıktı sıralaması için Python'da yürünür.
+REACHABLE_UP = """
+WITH RECURSIVE r(id) AS (
+    SELECT :kok
+    UNION
+    SELECT y.giris FROM yukari y JOIN r ON y.cikis = r.id
+)
+"""
+REACHABLE_DOWN = """
+WITH RECURSIVE r(id) AS (
+    SELECT :kok
+    UNION
+    SELECT a.cikis FROM asagi a JOIN r ON a.giris = r.id
+)
+"""
+UP_EDGES_SQL = REACHABLE_UP + "SELECT y.cikis, y.giris FROM r JOIN yukari y ON y.cikis = r.id ORDER BY y.cikis, y.sira"
+DOWN_EDGES_SQL = REACHABLE_DOWN + \
+    "SELECT a.giris, a.cikis, a.etiket FROM r JOIN asagi a ON a.giris = r.id ORDER BY a.giris, a.sira"
+UP_NODES_SQL = REACHABLE_UP + \
+    "SELECT d.id, d.barkod, d.aciklama, d.makine, d.tuketim, d.zaman, d.proses, d.adim FROM r JOIN dugumler d ON d.id = r.id"
+DOWN_NODES_SQL = REACHABLE_DOWN + \
+    ("SELECT d.id, d.barkod, d.ileri_aciklama, d.etiketli, d.etiket_makine, d.etiket_zaman, d.etiket_proses, "
+     "d.metre FROM r JOIN dugumler d ON d.id = r.id")
+
+
+def is_database(path):
+    return path.lower().endswith(DB_EXTENSIONS)
+
+
+def _text(value):
+    return None if value is None or (isinstance(value, float) and np.isnan(value)) else str(value)
+
+
+def _or_nan(value):
+    # SQLite NULL -> indeks izlemesindeki eksik değer
+    return np.nan if value is None else value
+
+
+def _subgraph(conn, edges_sql, nodes_sql, root):
+    """
+    Edges ``{node: [(child, *values), ...]}`` and attribute rows ``{node: (...)}`` of the
+    subgraph reachable from ``root``, each read with one recursive query.
+    """
+    nodes = {row[0]: row[1:] for row in conn.execute(nodes_sql, {'kok': root})}
+    edges = {node: [] for node in nodes}
+    for node, *edge in conn.execute(edges_sql, {'kok': root}):
+        edges[node].append(tuple(edge))
+    return edges, nodes
+
+
+def _node_records(index):
+    out_row = np.asarray(index.out_row)
+    for node in range(len(index)):
+        barcode = index.barcode(node)
+        info = get_product_info(index, node)
+        taban, dash, sonek = barcode.rpartition('-')
+        output = bool(out_row[node] >= 0)
+        numeric = output and dash == '-' and sonek.isdigit()
+        row = int(index.sap_row[node])
+        yield (
+            node, barcode, int(output), taban if numeric else None, int(sonek) if numeric else None,
+            format_value(info['urun_aciklamasi']),
+            format_value(info['makine']),
+            format_value(info['tuketim'], 'float'),
+            format_value(info['olusturma_zamani'], 'datetime'),
+            format_value(info['proses']),
+            f"{info['proses']} ({barcode})",
+            _text(forward_description(index, node)),
+            int(row >= 0),
+            _text(index.text_at('makine', row)) if row >= 0 else None,
+            format_value(index.time_at(row), 'datetime') if row >= 0 else None,
+            _text(index.text_at('proses', row)) if row >= 0 else None,
+            index.metre_at(row) if row >= 0 else None,
+        )
+
+
+def _edge_records(indptr, indices, value):
+    for node in range(len(indptr) - 1):
+        for sira, pos in enumerate(range(indptr[node], indptr[node + 1])):
+            yield node, sira, int(indices[pos]), value(pos)
+
+
+def build_database(source, db_path, sheet_name='VERİ'):
+    """
+    Write the genealogy of ``source`` (workbook or store directory) to a SQLite file.
+
+    The database is built next to ``db_path`` and moved into place at the end, so open
+    readers keep working on the previous file until they reconnect.
+    """
+    index = load_index(source, sheet_name)
+    tmp_path = db_path + '.yeni'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # Dosya kurulduktan sonra hiç yazılmaz; günlük tutmaya gerek yok
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        conn.executemany("INSERT INTO dugumler VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         _node_records(index))
+        up_kg = np.asarray(index.up_kg)
+        conn.executemany("INSERT INTO yukari VALUES (?, ?, ?, ?)",
+                         _edge_records(index.up_indptr, index.up_indices, lambda pos: float(up_kg[pos])))
+        down_indices, down_rows = np.asarray(index.down_indices), np.asarray(index.down_rows)
+        conn.executemany("INSERT INTO asagi VALUES (?, ?, ?, ?)", _edge_records(
+            index.down_indptr, down_indices,
+            lambda pos: f"{index.text_at('proses', down_rows[pos])} ({index.barcode(down_indices[pos])})"))
+        conn.executescript(INDEXES)
+        conn.executemany("INSERT INTO bilgi VALUES (?, ?)", [
+            ('surum', str(DB_VERSION)),
+            ('kaynak', os.path.abspath(source)),
+            ('imza', source_signature(source, sheet_name)),
+            ('olusturma', datetime.now().isoformat(timespec='seconds')),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return len(index)
+
+
+def connect(db_path):
+    """Open a read-only connection; several processes may query the same file at once."""
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True, check_same_thread=False)
+    version = conn.execute("SELECT deger FROM bilgi WHERE anahtar = 'surum'").fetchone()
+    if version is None or int(version[0]) != DB_VERSION:
+        conn.close()
+        raise ValueError(f"Veritabanı sürümü uyumsuz: {version[0] if version else None}")
+    return conn
+
+
+def find_targets(conn, search_term, verbose=True):
+    """SQLite counterpart of ``find_target_barcodes``: exact, base or range search."""
+    log = print if verbose else (lambda *a, **k: None)
+    rng = parse_range(search_term)
+    if rng:
+        base, first, last = rng
+        log(f"Aralık araması yapılıyor: {base}-{first} .. {base}-{last}")
+        rows = conn.execute("SELECT barkod FROM dugumler WHERE taban = ? AND sonek BETWEEN ? AND ? "
+                            "ORDER BY sonek, barkod", (base, first, last)).fetchall()
+        if not rows:
+            log(f"Uyarı: {search_term} aralığında barkod bulunamadı.")
+        return [r[0] for r in rows]
+
+    if '-' in search_term and search_term.endswith(tuple('0123456789')):
+        log(f"Tam barkod araması yapılıyor: {search_term}")
+        if conn.execute("SELECT 1 FROM dugumler WHERE barkod = ? AND cikti = 1", (search_term,)).fetchone():
+            return [search_term]
+        log(f"Uyarı: {search_term} barkodu bulunamadı.")
+        return []
+
+    log(f"Temel barkod araması yapılıyor: {search_term}")
+    rows = conn.execute("SELECT barkod FROM dugumler WHERE taban = ? ORDER BY sonek, barkod",
+                        (search_term,)).fetchall()
+    if not rows:
+        log(f"Uyarı: {search_term} ile başlayan barkod bulunamadı.")
+        return []
+    target_barcodes = [r[0] for r in rows]
+    log(f"Bulunan barkodlar: {target_barcodes}")
+    return target_barcodes
+
+
+def trace_backwards(conn, target_barcodes, verbose=True):
+    """Backward trace over the recursive-CTE subgraph; rows match ``izlenebilirlik_indeks.trace_backwards``."""
+    results = []
+    for i, barcode in enumerate(target_barcodes, 1):
+        if verbose:
+            print(f"  {i}/{len(target_barcodes)}: {barcode} işleniyor...")
+        root = conn.execute("SELECT id FROM dugumler WHERE barkod = ?", (barcode,)).fetchone()
+        if root is None:
+            continue
+        edges, nodes = _subgraph(conn, UP_EDGES_SQL, UP_NODES_SQL, root[0])
+        # Ön-sıra; her düğüm ilk ulaşıldığı yolla bir kez yazılır
+        visited = set()
+        stack = [(root[0], "")]
+        while stack:
+            node, yol = stack.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+            barkod, aciklama, makine, tuketim, zaman, proses, adim = nodes[node]
+            yol = f"{yol} -> {adim}" if yol else adim
+            results.append({
+                "Barkod": barkod,
+                "Ürün Açıklaması": aciklama,
+                "Makine": makine,
+                "Tüketim": tuketim,
+                "Oluşturma Zamanı": zaman,
+                "Proses": proses,
+                "İşlem Döngüsü": yol,
+            })
+            stack.extend((child, yol) for child, in reversed(edges[node]))
+    return results
+
+
+def trace_forwards(conn, raw_material_codes, verbose=True):
+    """Forward trace over the recursive-CTE subgraph; rows match ``izlenebilirlik_indeks.trace_forwards``."""
+    results = []
+    for code in raw_material_codes:
+        code = code.strip()
+        root = conn.execute("SELECT d.id FROM dugumler d WHERE d.barkod = ? "
+                            "AND EXISTS (SELECT 1 FROM asagi a WHERE a.giris = d.id)", (code,)).fetchone()
+        if root is None:
+            if verbose:
+                print(f"Belirtilen hammadde kodu ({code}) bulunamadı veya herhangi bir prosesin girdisi değil.")
+            continue
+        if verbose:
+            print(f"İşleniyor: {code}")
+        edges, nodes = _subgraph(conn, DOWN_EDGES_SQL, DOWN_NODES_SQL, root[0])
+        # Satırlar yol başına yazılır (indeks izlemesiyle aynı); alt grafik yukarıda bir kez okundu
+        stack = [(True, root[0], 0, "")]
+        on_path = set()
+        while stack:
+            entering, node, depth, zincir = stack.pop()
+            if not entering:
+                on_path.discard(node)
+                continue
+            barkod, aciklama, etiketli, makine, zaman, proses, metre = nodes[node]
+            aciklama = _or_nan(aciklama)
+            results.append({
+                'Barkod': barkod,
+                'Ürün Açıklaması': f"{'-' * depth} {aciklama}" if depth > 0 else aciklama,
+                'Makine': _or_nan(makine) if etiketli else "",
+                'Oluşturma Zamanı': (pd.Timestamp(zaman) if zaman else pd.NaT) if etiketli else "",
+                'Proses': _or_nan(proses) if etiketli else "",
+                'Miktar (Metre)': _or_nan(metre) if etiketli else "",
+                'İşlem Döngüsü': zincir,
+            })
+            if not edges[node]:
+                continue
+            on_path.add(node)
+            stack.append((False, node, depth, None))
+            for child, etiket in reversed(edges[node]):
+                if child in on_path:
+                    if verbose:
+                        print(f"Uyarı: Döngü tespit edildi, atlanıyor: {barkod} -> {nodes[child][0]}")
+                    continue
+                stack.append((True, child, depth + 1, f"{zincir} -> {etiket}" if zincir else etiket))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Soy ağacını sorgulanabilir bir SQLite dosyasına yazar (sunucu gerekmez).")
+    parser.add_argument('kaynak', help="VERİ sayfasını içeren Excel/CSV dosyası ya da depo klasörü")
+    parser.add_argument('veritabani', help="Oluşturulacak SQLite dosyası (ör. izlenebilirlik.db)")
+    parser.add_argument('--sayfa', default='VERİ', help="Kaynak Excel sayfa adı")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.kaynak):
+        print(f"Hata: '{args.kaynak}' bulunamadı.")
+        return 2
+    start = time.perf_counter()
+    nodes = build_database(args.kaynak, args.veritabani, args.sayfa)
+    print(f"'{args.veritabani}' oluşturuldu: {nodes} düğüm ({time.perf_counter() - start:.1f} sn).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
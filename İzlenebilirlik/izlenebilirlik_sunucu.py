@@ -0,0 +1,144 @@
+import os
+import json
+import asyncio
+import argparse
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+from izlenebilirlik_onbellek import source_signature
+from izlenebilirlik_indeks import load_index, find_target_barcodes, trace_backwards
+
+# Kaynak dosya değişikliğinin kontrol aralığı (saniye)
+RELOAD_INTERVAL = 10
+
+
+class TraceServer:
+    """
+    Serve backward trace queries from a warm genealogy index over HTTP or a Unix socket.
+
+    GET /izle?barkod=79528600-33   exact barcode
+    GET /izle?barkod=79528600      all 79528600-* labels
+    GET /durum                     loaded source and index size
+    """
+
+    def __init__(self, file_path, sheet_name='VERİ', reload_interval=RELOAD_INTERVAL):
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.reload_interval = reload_interval
+        self.index = None
+        self.signature = None
+        self.loaded_at = None
+
+    def _load(self):
+        signature = source_signature(self.file_path, self.sheet_name)
+        index = load_index(self.file_path, self.sheet_name)
+        return signature, index
+
+    async def reload(self):
+        loop = asyncio.get_running_loop()
+        signature, index = await loop.run_in_executor(None, self._load)
+        # Tek atamayla değiştir; süren sorgular eski indeksle tamamlanır
+        self.index, self.signature = index, signature
+        self.loaded_at = datetime.now()
+        print(f"İndeks yüklendi: {len(index)} düğüm ({self.loaded_at:%Y-%m-%d %H:%M:%S})")
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                signature = source_signature(self.file_path, self.sheet_name)
+            except OSError as e:
+                print(f"Uyarı: Kaynak dosyaya erişilemiyor -> {e}")
+                continue
+            if signature != self.signature:
+                print("Kaynak dosya değişti, indeks yeniden yükleniyor...")
+                try:
+                    await self.reload()
+                except Exception as e:
+                    print(f"Uyarı: Yeniden yükleme başarısız, eski indeks kullanılıyor -> {e}")
+
+    def query(self, search_term):
+        index = self.index
+        targets = find_target_barcodes(index, search_term, verbose=False)
+        rows = trace_backwards(index, targets, verbose=False)
+        rows.sort(key=lambda r: r['İşlem Döngüsü'])
+        return {'arama': search_term, 'barkodlar': targets, 'satir_sayisi': len(rows), 'sonuclar': rows}
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            # başlıkları boş satıra kadar tüket
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin1').split()
+            if len(parts) < 2 or parts[0] != 'GET':
+                await self._respond(writer, 405, {'hata': 'Yalnızca GET desteklenir'})
+                return
+            url = urlsplit(parts[1])
+            params = parse_qs(url.query)
+            if url.path == '/durum':
+                await self._respond(writer, 200, {
+                    'kaynak': os.path.abspath(self.file_path),
+                    'dugum_sayisi': len(self.index),
+                    'yuklenme': self.loaded_at.strftime('%Y-%m-%d %H:%M:%S'),
+                })
+            elif url.path == '/izle':
+                search_term = (params.get('barkod') or [''])[0].strip()
+                if not search_term:
+                    await self._respond(writer, 400, {'hata': "'barkod' parametresi gerekli"})
+                    return
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, self.query, search_term)
+                await self._respond(writer, 200 if result['barkodlar'] else 404, result)
+            else:
+                await self._respond(writer, 404, {'hata': f"Bilinmeyen adres: {url.path}"})
+        except Exception as e:
+            await self._respond(writer, 500, {'hata': str(e)})
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   500: 'Internal Server Error'}
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n")
+        writer.write(head.encode('latin1') + body)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_path=None):
+        await self.reload()
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+            print(f"Sunucu dinliyor: unix:{unix_path}")
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            print(f"Sunucu dinliyor: http://{host}:{port}/izle?barkod=...")
+        watcher = asyncio.create_task(self.watch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="İzlenebilirlik sorgu sunucusu")
+    parser.add_argument('kaynak', nargs='?', default='2025.xlsx', help="VERİ sayfasını içeren Excel dosyası")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="TCP yerine bu Unix soket yolunu dinle")
+    parser.add_argument('--yenileme', type=float, default=RELOAD_INTERVAL,
+                        help="Kaynak dosya değişikliği kontrol aralığı (saniye)")
+    args = parser.parse_args()
+
+    server = TraceServer(args.kaynak, reload_interval=args.yenileme)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("Sunucu durduruldu.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import pandas as pd
-from datetime import datetime
-import re
+from izlenebilirlik_indeks import load_index, find_target_barcodes, trace_backwards
+from izlenebilirlik_cikti import write_results, output_file_name, OUTPUT_FORMATS
 
 def track_production_backwards(file_path, search_term):
     """
@@ -16,227 +16,19 @@ def track_production_backwards(file_path, search_term):
     Returns:
         pd.DataFrame: A DataFrame containing the tracked production steps.
     """
-    # Load data
+    # Load data (indeks önbellekte varsa Excel hiç okunmaz)
     print("Veriler yükleniyor...")
-    df = pd.read_excel(file_path, sheet_name='VERİ')
-    
-    # Ensure barcodes are strings for consistent comparison
-    df['GİRİŞ ÜRÜN SAP BARKODU'] = df['GİRİŞ ÜRÜN SAP BARKODU'].astype(str)
-    df['TEYİT VERİLEN BARKOD'] = df['TEYİT VERİLEN BARKOD'].astype(str)
-    df['SAP ETİKET BARKODU'] = df['SAP ETİKET BARKODU'].astype(str)
-
-    # Create mappings
-    output_to_input_map = {}
-    input_barkod_to_row_map = {}
-    sap_etiket_to_row_map = {}
-    
-    for _, row in df.iterrows():
-        # Map for output tracking
-        output_barkod = row['TEYİT VERİLEN BARKOD']
-        if output_barkod not in output_to_input_map:
-            output_to_input_map[output_barkod] = []
-        output_to_input_map[output_barkod].append(row)
-        
-        # Map for input description lookup
-        input_barkod = row['GİRİŞ ÜRÜN SAP BARKODU']
-        if input_barkod not in input_barkod_to_row_map:
-            input_barkod_to_row_map[input_barkod] = row
-            
-        # Map for SAP etiket lookup
-        sap_barkod = row['SAP ETİKET BARKODU']
-        if sap_barkod not in sap_etiket_to_row_map:
-            sap_etiket_to_row_map[sap_barkod] = row
+    index = load_index(file_path, sheet_name='VERİ')
 
     # Determine search type and find target barcodes
-    target_barcodes = []
-    if '-' in search_term and search_term.endswith(tuple('0123456789')):
-        # Exact barcode search
-        print(f"Tam barkod araması yapılıyor: {search_term}")
-        if search_term in output_to_input_map:
-            target_barcodes = [search_term]
-        else:
-            print(f"Uyarı: {search_term} barkodu bulunamadı.")
-            return pd.DataFrame()
-    else:
-        # Base barcode search - find all barcodes starting with this base
-        print(f"Temel barkod araması yapılıyor: {search_term}")
-        pattern = f"^{re.escape(search_term)}-\\d+$"
-        target_barcodes = [barcode for barcode in output_to_input_map.keys() if re.match(pattern, barcode)]
-        if not target_barcodes:
-            print(f"Uyarı: {search_term} ile başlayan barkod bulunamadı.")
-            return pd.DataFrame()
-        print(f"Bulunan barkodlar: {target_barcodes}")
-
-    results = []
-
-    def get_product_info(barcode, context_row=None):
-        """Get product information for a given barcode, with special handling for TF materials."""
-        # Helper to determine if a description starts with TF
-        def starts_with_tf(description):
-            if pd.isna(description) or not description or str(description).strip().lower() in ["", "nan"]:
-                return False
-            first_word = str(description).split()[0] if str(description).split() else ""
-            return first_word.upper().startswith('TF')
-
-        # Helper to extract process from description
-        def extract_proses(description):
-            if pd.isna(description) or not description or str(description).strip().lower() in ["", "nan"]:
-                return "?"
-            first_word = str(description).split()[0]
-            proses_code = re.split(r'[^A-Za-z0-9]', first_word)[0]
-            return proses_code if proses_code else "?"
-
-        # 1. Check if this barcode appears as an output (TEYİT VERİLEN BARKOD)
-        if barcode in output_to_input_map:
-            representative_row = output_to_input_map[barcode][0]
-            cikis_aciklama = representative_row.get('ÇIKIŞ ÜRÜN ACIKLAMA', '')
-            giris_aciklama = representative_row.get('GİRİŞ ÜRÜN ACIKLAMA', '')
-            
-            # Determine process: Check for TF first, then use PROSES column, then extract from description
-            if starts_with_tf(cikis_aciklama) or starts_with_tf(giris_aciklama):
-                proses = 'TF'
-            else:
-                proses = representative_row.get('PROSES', '')
-                if not proses or str(proses).lower() == 'nan':
-                    # Fallback to description
-                    desc = cikis_aciklama if cikis_aciklama and str(cikis_aciklama).lower() != 'nan' else giris_aciklama
-                    proses = extract_proses(desc)
-
-            return {
-                'urun_aciklamasi': cikis_aciklama if cikis_aciklama and str(cikis_aciklama).lower() != 'nan' else giris_aciklama,
-                'makine': representative_row.get('MAKİNE NO', ''),
-                'tuketim': representative_row.get('GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg', 0),
-                'olusturma_zamani': representative_row.get('OLUŞTURMA ZAMANI', ''),
-                'proses': proses,
-                'row': representative_row
-            }
-        
-        # 2. Check as SAP ETİKET BARKODU (could be raw material or intermediate)
-        elif barcode in sap_etiket_to_row_map:
-            row = sap_etiket_to_row_map[barcode]
-            cikis_aciklama = row.get('ÇIKIŞ ÜRÜN ACIKLAMA', '')
-            giris_aciklama = row.get('GİRİŞ ÜRÜN ACIKLAMA', 'Bilinmiyor')
-            
-            # Determine process for SAP ETİKET entries
-            if starts_with_tf(cikis_aciklama) or starts_with_tf(giris_aciklama):
-                proses = 'TF'
-            else:
-                proses = row.get('PROSES', '')
-                if not proses or str(proses).lower() == 'nan':
-                    # Fallback to description
-                    desc = cikis_aciklama if cikis_aciklama and str(cikis_aciklama).lower() != 'nan' else giris_aciklama
-                    proses = extract_proses(desc)
-        
-            return {
-                'urun_aciklamasi': giris_aciklama, # SAP ETİKET often represents the input/raw material
-                'makine': row.get('MAKİNE NO', ''),
-                'tuketim': row.get('GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg', 0) if pd.notna(row.get('GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg')) else 0,
-                'olusturma_zamani': row.get('OLUŞTURMA ZAMANI', ''),
-                'proses': proses,
-                'row': row
-            }
-        
-        # 3. Check if it's used as input somewhere (likely a raw material)
-        elif barcode in input_barkod_to_row_map:
-            row = input_barkod_to_row_map[barcode]
-            giris_aciklama = row.get('GİRİŞ ÜRÜN ACIKLAMA', 'Bilinmiyor')
-            
-            # Determine process for INPUT entries (often raw materials)
-            if starts_with_tf(giris_aciklama):
-                proses = 'TF'
-            else:
-                proses = row.get('PROSES', '') 
-                # Often no PROSES in input row, so extract from description
-                if not proses or str(proses).lower() == 'nan':
-                    proses = extract_proses(giris_aciklama)
-                
-            return {
-                'urun_aciklamasi': giris_aciklama,
-                'makine': row.get('MAKİNE NO', ''),
-                'tuketim': row.get('GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg', 0) if pd.notna(row.get('GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg')) else 0,
-                'olusturma_zamani': row.get('OLUŞTURMA ZAMANI', ''),
-                'proses': proses,
-                'row': row
-            }
-        
-        # 4. If not found anywhere, return default values
-        else:
-            return {
-                'urun_aciklamasi': 'Bilinmiyor',
-                'makine': 'Bilinmiyor',
-                'tuketim': 0,
-                'olusturma_zamani': '',
-                'proses': 'Bilinmiyor',
-                'row': None
-            }
-
-    def format_value(value, value_type='string'):
-        """Format values properly"""
-        if value_type == 'float':
-            if pd.notna(value):
-                return float(value)
-            return 0
-        elif value_type == 'datetime':
-            if pd.notna(value):
-                if isinstance(value, datetime):
-                    return value.strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    return str(value)
-            return ''
-        else:
-            if pd.notna(value) and str(value).lower() != 'nan':
-                return str(value)
-            return ''
-
-    def find_path(current_barcodes, current_path, visited):
-        """Recursively finds the path backwards."""
-        for current_barcode in current_barcodes:
-            if current_barcode in visited:
-                continue
-            visited.add(current_barcode)
-
-            # Get product information
-            product_info = get_product_info(current_barcode)
-            
-            # Check if this barcode has inputs (is a produced item)
-            rows_for_output = output_to_input_map.get(current_barcode, [])
-            
-            if rows_for_output:
-                # This is a produced item, get its production info
-                representative_row = rows_for_output[0]
-                
-                results.append({
-                    "Barkod": current_barcode,
-                    "Ürün Açıklaması": format_value(product_info['urun_aciklamasi']),
-                    "Makine": format_value(product_info['makine']),
-                    "Tüketim": format_value(representative_row.get('GİRİŞ ÜRÜN TÜKETİM MİKTARI Kg', 0), 'float'),
-                    "Oluşturma Zamanı": format_value(representative_row.get('OLUŞTURMA ZAMANI', ''), 'datetime'),
-                    "Proses": format_value(product_info['proses']),
-                    "İşlem Döngüsü": " -> ".join(current_path + [f"{product_info['proses']} ({current_barcode})"])
-                })
-                
-                # Find input barcodes and continue recursion
-                input_barcodes = [row['GİRİŞ ÜRÜN SAP BARKODU'] for row in rows_for_output if pd.notna(row['GİRİŞ ÜRÜN SAP BARKODU'])]
-                new_path = current_path + [f"{product_info['proses']} ({current_barcode})"]
-                find_path(input_barcodes, new_path, visited)
-            else:
-                # This is likely a raw material (TF or other)
-                results.append({
-                    "Barkod": current_barcode,
-                    "Ürün Açıklaması": format_value(product_info['urun_aciklamasi']),
-                    "Makine": format_value(product_info['makine']),
-                    "Tüketim": format_value(product_info['tuketim'], 'float'),
-                    "Oluşturma Zamanı": format_value(product_info['olusturma_zamani'], 'datetime'),
-                    "Proses": format_value(product_info['proses']),
-                    "İşlem Döngüsü": " -> ".join(current_path + [f"{product_info['proses']} ({current_barcode})"])
-                })
+    target_barcodes = find_target_barcodes(index, search_term)
+    if not target_barcodes:
+        return pd.DataFrame()
 
     # Start tracking for each target barcode
     print(f"İzleme başlatılıyor, {len(target_barcodes)} barkod işlenecek...")
-    for i, barcode in enumerate(target_barcodes, 1):
-        print(f"  {i}/{len(target_barcodes)}: {barcode} işleniyor...")
-        find_path([barcode], [], set())
-        
+    results = trace_backwards(index, target_barcodes)
+
     # Convert results to DataFrame and sort by the content of the process cycle
     result_df = pd.DataFrame(results)
     if not result_df.empty:
@@ -246,39 +38,19 @@ def track_production_backwards(file_path, search_term):
         
     return result_df
 
-def save_results_to_excel(df_sonuc, search_term):
-    """Save results to Excel with proper formatting"""
+def save_results_to_excel(df_sonuc, search_term, fmt='xlsx'):
+    """Save results as xlsx (streamed, split into sheets past Excel's row limit), csv or parquet"""
     if df_sonuc.empty:
         print("Kaydedilecek veri yok.")
         return
         
     # Benzersiz bir dosya adı oluştur
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe_search_term = re.sub(r'[^\w\-_\. ]', '_', search_term)
-    output_file = f"uretim_izleme_sonucu_{safe_search_term}_{timestamp}.xlsx"
+    output_file = output_file_name("uretim_izleme_sonucu", search_term, fmt)
 
     try:
-        # Excel writer ile sütun genişliklerini ayarla
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            df_sonuc.to_excel(writer, index=False, sheet_name='İzleme Sonuçları')
-            
-            # Sütun genişliklerini ayarla
-            worksheet = writer.sheets['İzleme Sonuçları']
-            column_widths = {
-                'A': 18,  # Barkod
-                'B': 40,  # Ürün Açıklaması
-                'C': 12,  # Makine
-                'D': 15,  # Tüketim
-                'E': 20,  # Oluşturma Zamanı
-                'F': 12,  # Proses
-                'G': 100  # İşlem Döngüsü
-            }
-            
-            for column, width in column_widths.items():
-                worksheet.column_dimensions[column].width = width
-        
+        total, sheets = write_results(df_sonuc, output_file, fmt, sheet_name='İzleme Sonuçları')
         print(f"\nSonuç '{output_file}' dosyasına kaydedildi.")
-        print(f"Toplam {len(df_sonuc)} satır kaydedildi.")
+        print(f"Toplam {total} satır kaydedildi." + (f" ({sheets} sayfaya bölündü)" if sheets > 1 else ""))
         
     except PermissionError as e:
         print(f"Hata: Dosyaya yazma izniniz yok. Lütfen '{output_file}' dosyasının açık olmadığından emin olun.")
@@ -288,7 +60,7 @@ def save_results_to_excel(df_sonuc, search_term):
 
 # --- Ana Program ---
 if __name__ == "__main__":
-    # Dosya yolu
+    # Dosya yolu (Excel ya da izlenebilirlik_ekleme.py ile biriktirilen depo klasörü)
     file_path = '2025.xlsx'  # Gerçek dosya yoluyla değiştirin
     
     # Kullanıcıdan giriş al
@@ -322,9 +94,13 @@ if __name__ == "__main__":
             print(df_sonuc.head(20).to_string(index=False))
             
             # Kullanıcıya dosyaya kaydetmek isteyip sorma
-            save_choice = input(f"\n{len(df_sonuc)} sonuç bulundu. Excel dosyasına kaydetmek ister misiniz? (e/h): ").strip().lower()
+            save_choice = input(f"\n{len(df_sonuc)} sonuç bulundu. Dosyaya kaydetmek ister misiniz? (e/h): ").strip().lower()
             if save_choice in ['e', 'evet', 'y', 'yes']:
-                save_results_to_excel(df_sonuc, search_input)
+                fmt = input(f"Çıktı biçimi ({'/'.join(OUTPUT_FORMATS)}) [xlsx]: ").strip().lower() or 'xlsx'
+                if fmt not in OUTPUT_FORMATS:
+                    print(f"Geçersiz biçim '{fmt}', xlsx kullanılacak.")
+                    fmt = 'xlsx'
+                save_results_to_excel(df_sonuc, search_input, fmt)
                 
         except FileNotFoundError:
             print(f"Hata: '{file_path}' dosyası bulunamadı. Lütfen dosya yolunu kontrol edin.")